@@ -1,14 +1,7 @@
-from openai import OpenAI
-import os
+from OpenAIClient import get_client
 import time
 import re
 
-try:
-    from keys import OPENAI_API_KEY
-    client = OpenAI(api_key=OPENAI_API_KEY)
-except ImportError:
-    client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
-
 
 class ActionItem:
     """Represents a single action item or task"""
@@ -86,7 +79,7 @@ QUESTIONS:
 
 Only include items that are clearly present. Use "NONE" for empty sections."""
 
-            response = client.chat.completions.create(
+            response = get_client().chat.completions.create(
                 model="gpt-4o-mini",
                 messages=[{"role": "user", "content": prompt}],
                 temperature=0.2,
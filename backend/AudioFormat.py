@@ -0,0 +1,3 @@
+SAMPLE_RATE = 16000  # recorders queue, and Whisper decodes, 16-bit mono PCM at 16 kHz
+SAMPLE_WIDTH = 2
+BYTES_PER_SECOND = SAMPLE_RATE * SAMPLE_WIDTH
@@ -1,13 +1,21 @@
 import custom_speech_recognition as sr
-import pyaudiowpatch as pyaudio
-from datetime import datetime
+from custom_speech_recognition import dsp
+from datetime import datetime, timedelta
+from AudioFormat import SAMPLE_RATE, SAMPLE_WIDTH
+from NoiseCalibration import NoiseCalibrator, load_calibration, save_calibration
 
 RECORD_TIMEOUT = 3
 ENERGY_THRESHOLD = 1000
 DYNAMIC_ENERGY_THRESHOLD = False
+CAPTURE_BLOCK_SECONDS = 0.1  # PortAudio callback block size; endpointing runs once per block
+
+def to_mono_16k(data, sample_rate, channels):
+    """Downmixes interleaved 16-bit PCM to mono and resamples it to 16 kHz in one vectorised pass"""
+    samples = dsp.downmix_array(dsp.to_array(data, 2), channels)
+    return dsp.from_array(dsp.resample_array(samples, sample_rate, SAMPLE_RATE), SAMPLE_WIDTH)
 
 class BaseRecorder:
-    def __init__(self, source):
+    def __init__(self, source, vad=None, device_name=None):
         self.recorder = sr.Recognizer()
         self.recorder.energy_threshold = ENERGY_THRESHOLD
         self.recorder.dynamic_energy_threshold = DYNAMIC_ENERGY_THRESHOLD
@@ -16,27 +24,103 @@ class BaseRecorder:
             raise ValueError("audio source can't be None")
 
         self.source = source
+        self.device_name = device_name or getattr(source, "device_name", None)
+
+        # voice activity detection: gates phrase detection where the detector can stream, and always
+        # drops non-speech phrases and trims silence before anything is queued
+        self.vad = vad if vad is not None else sr.get_default_vad(ENERGY_THRESHOLD)
+        if self.vad.streaming and self.vad.supports(source.SAMPLE_RATE):
+            self.recorder.vad = self.vad
+        self.captured_seconds = 0.0
+        self.skipped_seconds = 0.0
+
+        # format of the audio this recorder puts on its queue: always 16-bit mono at 16 kHz
+        self.SAMPLE_RATE = SAMPLE_RATE
+        self.SAMPLE_WIDTH = source.SAMPLE_WIDTH
+        self.channels = 1
+
+        self.noise_calibrator = NoiseCalibrator(self)
+        self.calibrated_live = False
+
+    @property
+    def uses_energy_threshold(self):
+        """Phrases are detected by energy unless a streaming VAD other than EnergyVAD took over"""
+        return self.recorder.vad is None or isinstance(self.recorder.vad, sr.EnergyVAD)
+
+    def set_energy_threshold(self, energy_threshold):
+        self.recorder.energy_threshold = energy_threshold
+        if isinstance(self.vad, sr.EnergyVAD):
+            self.vad.energy_threshold = energy_threshold
 
     def adjust_for_noise(self, device_name, msg):
+        if not self.uses_energy_threshold:
+            return  # the VAD doesn't use an energy threshold, so there is nothing to calibrate
+
+        cached = load_calibration(self.device_name, self.source.SAMPLE_RATE) if self.device_name else None
+        if cached is not None:
+            print(f"[INFO] Using cached noise calibration for {device_name} (energy threshold {cached}).")
+            self.set_energy_threshold(cached)
+            return
+
         print(f"[INFO] Adjusting for ambient noise from {device_name}. " + msg)
         with self.source:
             self.recorder.adjust_for_ambient_noise(self.source)
+        self.set_energy_threshold(self.recorder.energy_threshold)
+        self.calibrated_live = True
+        if self.device_name:
+            save_calibration(self.device_name, self.source.SAMPLE_RATE, self.recorder.energy_threshold)
         print(f"[INFO] Completed ambient noise adjustment for {device_name}.")
 
+    def get_vad_stats(self):
+        return {
+            "detector": type(self.vad).__name__,
+            "captured_seconds": round(self.captured_seconds, 2),
+            "skipped_seconds": round(self.skipped_seconds, 2),
+            "capture_overruns": getattr(self.source, "overruns", 0)
+        }
+
     def record_into_queue(self, audio_queue):
+        source = self.source
+        clock = getattr(source, "now", datetime.utcnow)  # replayed sources keep their own clock
+
         def record_callback(_, audio:sr.AudioData) -> None:
             data = audio.get_raw_data()
-            audio_queue.put((data, datetime.utcnow()))
+            if source.SAMPLE_RATE != SAMPLE_RATE or source.channels != 1:
+                data = to_mono_16k(data, source.SAMPLE_RATE, source.channels)
+
+            bytes_per_second = SAMPLE_RATE * self.SAMPLE_WIDTH
+            kept = self.vad.speech_range(data, SAMPLE_RATE, self.SAMPLE_WIDTH)
+            speech = data[kept[0]:kept[1]] if kept else b""
+            self.captured_seconds += len(data) / bytes_per_second
+            self.skipped_seconds += (len(data) - len(speech)) / bytes_per_second
+            if not speech:
+                return
+            # the callback runs after the closing pause, which listen and the VAD cut; stamp the end of the kept audio
+            trailing_seconds = audio.trailing_seconds + (len(data) - kept[1]) / bytes_per_second
+            audio_queue.put((speech, clock() - timedelta(seconds=trailing_seconds)))
+
+        # keep the threshold tracking the room from the quiet between phrases; replays have no device to calibrate
+        if self.uses_energy_threshold and self.device_name:
+            self.recorder.silence_callback = self.noise_calibrator.observe
+            self.noise_calibrator.start()
+
+        stop_listening = self.recorder.listen_in_background(self.source, record_callback, phrase_time_limit=RECORD_TIMEOUT)
 
-        self.recorder.listen_in_background(self.source, record_callback, phrase_time_limit=RECORD_TIMEOUT)
+        def stopper(wait_for_stop=True):
+            self.noise_calibrator.stop(wait=wait_for_stop)
+            stop_listening(wait_for_stop)
+
+        return stopper
 
 class DefaultMicRecorder(BaseRecorder):
     def __init__(self):
-        super().__init__(source=sr.Microphone(sample_rate=16000))
+        super().__init__(source=sr.CallbackMicrophone(sample_rate=SAMPLE_RATE, block_duration=CAPTURE_BLOCK_SECONDS))
         self.adjust_for_noise("Default Mic", "Please make some noise from the Default Mic...")
 
 class DefaultSpeakerRecorder(BaseRecorder):
     def __init__(self):
+        import pyaudiowpatch as pyaudio  # WASAPI loopback only exists on Windows
+
         with pyaudio.PyAudio() as p:
             wasapi_info = p.get_host_api_info_by_type(pyaudio.paWASAPI)
             default_speakers = p.get_device_info_by_index(wasapi_info["defaultOutputDevice"])
@@ -49,10 +133,20 @@ class DefaultSpeakerRecorder(BaseRecorder):
                 else:
                     print("[ERROR] No loopback device found.")
         
-        source = sr.Microphone(speaker=True,
-                               device_index= default_speakers["index"],
-                               sample_rate=int(default_speakers["defaultSampleRate"]),
-                               chunk_size=pyaudio.get_sample_size(pyaudio.paInt16),
-                               channels=default_speakers["maxInputChannels"])
+        source = sr.CallbackMicrophone(speaker=True,
+                                       device_index=default_speakers["index"],
+                                       sample_rate=int(default_speakers["defaultSampleRate"]),
+                                       block_duration=CAPTURE_BLOCK_SECONDS,
+                                       channels=default_speakers["maxInputChannels"])
         super().__init__(source=source)
-        self.adjust_for_noise("Default Speaker", "Please make or play some noise from the Default Speaker...")
\ No newline at end of file
+        self.adjust_for_noise("Default Speaker", "Please make or play some noise from the Default Speaker...")
+
+class ReplayRecorder(BaseRecorder):
+    """Plays audio files through the normal recording path instead of a live device, for headless runs"""
+    def __init__(self, files, speed=1.0, start_time=None, vad=None):
+        source = sr.ReplayAudioSource(files, speed=speed, block_duration=CAPTURE_BLOCK_SECONDS, start_time=start_time)
+        super().__init__(source=source, vad=vad)
+
+    @property
+    def finished(self):
+        return self.source.finished
@@ -1,133 +1,195 @@
-import wave
 import os
 import threading
-import tempfile
-import custom_speech_recognition as sr
-import io
-from datetime import timedelta
-import pyaudiowpatch as pyaudio
+import time
+import numpy as np
+from collections import deque
+from datetime import datetime, timedelta
 from heapq import merge
+from custom_speech_recognition import dsp
+from PhraseBuffer import PhraseBuffer, MAX_PHRASE_SECONDS
+from StreamingDecoder import StreamingDecoder
+from TranscriptionScheduler import TranscriptionScheduler
+from TranscriptSegments import SegmentFilter, join_segments
+from AudioFormat import SAMPLE_RATE
 
 PHRASE_TIMEOUT = 3.05
 MAX_PHRASES = 10
+LATENCY_WINDOW = 100  # decodes kept per source for latency metrics
+
+def default_decode_workers():
+    """One inference worker per source on hosts with enough cores to decode both channels at once"""
+    return 2 if (os.cpu_count() or 1) >= 4 else 1
+
+def pcm_to_float32(data, sample_rate, sample_width, channels):
+    """Converts interleaved little-endian PCM bytes into the mono 16 kHz float32 array Whisper expects"""
+    samples = dsp.downmix_array(dsp.to_float32(data, sample_width), channels)
+    return dsp.resample_array(samples, sample_rate, SAMPLE_RATE).astype(np.float32)
 
 class AudioTranscriber:
-    def __init__(self, mic_source, speaker_source, model):
+    def __init__(self, mic_source, speaker_source, model, streaming=True, max_phrase_seconds=MAX_PHRASE_SECONDS,
+                 decode_workers=None, fallback_model=None):
         self.transcript_data = {"You": [], "Speaker": []}
+        self.transcript_lock = threading.Lock()
+        self.phrase_text = {"You": {"committed": "", "tentative": ""}, "Speaker": {"committed": "", "tentative": ""}}
         self.transcript_changed_event = threading.Event()
+        self.stop_event = threading.Event()
+        self.threads = []
         self.audio_model = model
+        self.fallback_model = fallback_model  # faster model used while a "degrade" queue is overloaded
+        self.degraded_decodes = {"You": 0, "Speaker": 0}
+        self.recorders = {"You": mic_source, "Speaker": speaker_source}
+        self.decode_workers = decode_workers or default_decode_workers()
+        self.schedulers = {}
+        self.latency = {"You": deque(maxlen=LATENCY_WINDOW), "Speaker": deque(maxlen=LATENCY_WINDOW)}
+        self.segment_filter = SegmentFilter()
         self.audio_sources = {
             "You": {
                 "sample_rate": mic_source.SAMPLE_RATE,
                 "sample_width": mic_source.SAMPLE_WIDTH,
                 "channels": mic_source.channels,
-                "last_sample": bytes(),
+                "buffer": PhraseBuffer(max_phrase_seconds),
                 "last_spoken": None,
                 "new_phrase": True,
-                "process_data_func": self.process_mic_data
+                "decoder": None
             },
             "Speaker": {
                 "sample_rate": speaker_source.SAMPLE_RATE,
                 "sample_width": speaker_source.SAMPLE_WIDTH,
                 "channels": speaker_source.channels,
-                "last_sample": bytes(),
+                "buffer": PhraseBuffer(max_phrase_seconds),
                 "last_spoken": None,
                 "new_phrase": True,
-                "process_data_func": self.process_speaker_data
+                "decoder": None
             }
         }
 
+        # Streaming mode needs word timestamps; backends without them re-decode the whole phrase
+        self.streaming = streaming and hasattr(model, "transcribe_words")
+        if self.streaming:
+            for source_info in self.audio_sources.values():
+                source_info["decoder"] = StreamingDecoder(model, self.segment_filter)
+
     def transcribe_audio_queue(self, speaker_queue, mic_queue):
-        import queue
-        
-        while True:
+        if self.decode_workers > 1:
+            # decode the Speaker channel on its own thread so it never waits behind a mic decode
+            speaker_thread = threading.Thread(target=self.transcribe_sources, args=({"Speaker": speaker_queue},))
+            speaker_thread.daemon = True
+            speaker_thread.start()
+            self.threads.append(speaker_thread)
+            self.transcribe_sources({"You": mic_queue})
+        else:
+            self.transcribe_sources({"You": mic_queue, "Speaker": speaker_queue})
+
+    def transcribe_sources(self, queues):
+        scheduler = TranscriptionScheduler(queues)
+        if hasattr(self.audio_model, "attach_scheduler"):
+            self.audio_model.attach_scheduler(scheduler)  # the hybrid router weighs the backlog
+        self.schedulers["+".join(queues)] = scheduler
+
+        while not self.stop_event.is_set():
+            queued_audio = scheduler.wait()
+            if self.stop_event.is_set():
+                break
             pending_transcriptions = []
-            
-            mic_data = []
-            while True:
-                try:
-                    data, time_spoken = mic_queue.get_nowait()
-                    self.update_last_sample_and_phrase_status("You", data, time_spoken)
-                    mic_data.append((data, time_spoken))
-                except queue.Empty:
-                    break
-                    
-            speaker_data = []
-            while True:
-                try:
-                    data, time_spoken = speaker_queue.get_nowait()
-                    self.update_last_sample_and_phrase_status("Speaker", data, time_spoken)
-                    speaker_data.append((data, time_spoken))
-                except queue.Empty:
-                    break
-            
-            if mic_data:
-                source_info = self.audio_sources["You"]
-                try:
-                    fd, path = tempfile.mkstemp(suffix=".wav")
-                    os.close(fd)
-                    source_info["process_data_func"](source_info["last_sample"], path)
-                    text = self.audio_model.get_transcription(path)
-                    if text != '' and text.lower() != 'you':
-                        latest_time = max(time for _, time in mic_data)
-                        pending_transcriptions.append(("You", text, latest_time))
-                except Exception as e:
-                    print(f"Transcription error for You: {e}")
-                finally:
-                    os.unlink(path)
-            
-            if speaker_data:
-                source_info = self.audio_sources["Speaker"]
-                try:
-                    fd, path = tempfile.mkstemp(suffix=".wav")
-                    os.close(fd)
-                    source_info["process_data_func"](source_info["last_sample"], path)
-                    text = self.audio_model.get_transcription(path)
-                    if text != '' and text.lower() != 'you':
-                        latest_time = max(time for _, time in speaker_data)
-                        pending_transcriptions.append(("Speaker", text, latest_time))
-                except Exception as e:
-                    print(f"Transcription error for Speaker: {e}")
-                finally:
-                    os.unlink(path)
-            
+
+            for who_spoke, queued_data in queued_audio.items():
+                for data, time_spoken, *merged_from in queued_data:
+                    self.update_last_sample_and_phrase_status(who_spoke, data, time_spoken, *merged_from)
+                if queued_data:
+                    degraded = self.fallback_model is not None and scheduler.overloaded[who_spoke]
+                    model = self.fallback_model if degraded else self.audio_model
+                    if degraded:
+                        self.degraded_decodes[who_spoke] += 1
+                    self.transcribe_source(who_spoke, queued_data, pending_transcriptions, model)
+
             if pending_transcriptions:
-                pending_transcriptions.sort(key=lambda x: x[2])
-                for who_spoke, text, time_spoken in pending_transcriptions:
-                    self.update_transcript(who_spoke, text, time_spoken)
-                
+                pending_transcriptions.sort(key=lambda x: x[3])
+                with self.transcript_lock:
+                    for who_spoke, committed, tentative, time_spoken in pending_transcriptions:
+                        self.update_transcript(who_spoke, committed, time_spoken, tentative)
+
                 self.transcript_changed_event.set()
-            
-            threading.Event().wait(0.1)
 
-    def update_last_sample_and_phrase_status(self, who_spoke, data, time_spoken):
+        if hasattr(self.audio_model, "detach_scheduler"):
+            self.audio_model.detach_scheduler(scheduler)
+        scheduler.close()
+
+    def stop(self, timeout=None):
+        """Stops every transcription loop after its current decode and waits for the threads this transcriber started"""
+        self.stop_event.set()
+        for scheduler in list(self.schedulers.values()):
+            scheduler.wake()
+        for thread in self.threads:
+            thread.join(timeout)
+
+    def close(self):
+        """Releases the model handles; call after ``stop``"""
+        for model in (self.audio_model, self.fallback_model):
+            if model is not None:
+                model.close()
+
+    def transcribe_source(self, who_spoke, queued_data, pending_transcriptions, model=None):
         source_info = self.audio_sources[who_spoke]
-        if source_info["last_spoken"] and time_spoken - source_info["last_spoken"] > timedelta(seconds=PHRASE_TIMEOUT):
-            source_info["last_sample"] = bytes()
-            source_info["new_phrase"] = True
-        else:
-            source_info["new_phrase"] = False
-
-        source_info["last_sample"] += data
-        source_info["last_spoken"] = time_spoken 
-
-    def process_mic_data(self, data, temp_file_name):
-        audio_data = sr.AudioData(data, self.audio_sources["You"]["sample_rate"], self.audio_sources["You"]["sample_width"])
-        wav_data = io.BytesIO(audio_data.get_wav_data())
-        with open(temp_file_name, 'w+b') as f:
-            f.write(wav_data.read())
-
-    def process_speaker_data(self, data, temp_file_name):
-        with wave.open(temp_file_name, 'wb') as wf:
-            wf.setnchannels(self.audio_sources["Speaker"]["channels"])
-            p = pyaudio.PyAudio()
-            wf.setsampwidth(p.get_sample_size(pyaudio.paInt16))
-            wf.setframerate(self.audio_sources["Speaker"]["sample_rate"])
-            wf.writeframes(data)
-
-    def update_transcript(self, who_spoke, text, time_spoken):
+        model = model or self.audio_model
+        try:
+            decode_start = time.perf_counter()
+            if self.streaming:
+                committed, tentative = self.decode_tail(who_spoke, model)
+            else:
+                committed, tentative = self.decode_phrase(source_info["buffer"].view(), model), ''
+            latest_time = max(item[1] for item in queued_data)
+            self.latency[who_spoke].append((time.perf_counter() - decode_start,
+                                            (datetime.utcnow() - latest_time).total_seconds()))
+
+            text = f"{committed} {tentative}".strip()
+            # a decode whose new segments were all filtered out returns the text already shown; re-queueing it
+            # would wake the responder for nothing
+            unchanged = not source_info["new_phrase"] and \
+                self.phrase_text[who_spoke] == {"committed": committed, "tentative": tentative}
+            if text != '' and text.lower() != 'you' and not unchanged:
+                pending_transcriptions.append((who_spoke, committed, tentative, latest_time))
+        except Exception as e:
+            print(f"Transcription error for {who_spoke}: {e}")
+
+    def decode_phrase(self, audio, model):
+        """Re-decodes the whole phrase, keeping only the segments the filter trusts"""
+        if hasattr(model, "transcribe_segments"):
+            return join_segments(self.segment_filter.filter(model.transcribe_segments(audio)))
+        return model.get_transcription(audio)
+
+    def decode_tail(self, who_spoke, model=None):
+        """Re-decodes only the audio after the committed prefix of the current phrase"""
+        source_info = self.audio_sources[who_spoke]
+        decoder = source_info["decoder"]
+        return decoder.process(source_info["buffer"].view(decoder.offset_samples), model)
+
+    def update_last_sample_and_phrase_status(self, who_spoke, data, time_spoken, first_spoken=None):
+        """``first_spoken`` is the time of the first chunk when the queue coalesced several chunks into ``data``"""
+        source_info = self.audio_sources[who_spoke]
+        phrase_gap = (first_spoken or time_spoken) - source_info["last_spoken"] if source_info["last_spoken"] else None
+        new_phrase = bool(phrase_gap and phrase_gap > timedelta(seconds=PHRASE_TIMEOUT))
+        if new_phrase:
+            source_info["buffer"].clear()
+
+        # A phrase that hits the buffer's maximum length rolls over into a new one
+        if source_info["buffer"].append(self.process_data(who_spoke, data)):
+            new_phrase = True
+
+        source_info["new_phrase"] = new_phrase
+        if new_phrase and source_info["decoder"]:
+            source_info["decoder"].reset()
+        source_info["last_spoken"] = time_spoken
+
+    def process_data(self, who_spoke, data):
+        source_info = self.audio_sources[who_spoke]
+        return pcm_to_float32(data, source_info["sample_rate"], source_info["sample_width"], source_info["channels"])
+
+    def update_transcript(self, who_spoke, text, time_spoken, tentative=''):
+        """Updates the current phrase line; ``text`` is committed and ``tentative`` may still change on the next decode"""
         source_info = self.audio_sources[who_spoke]
         transcript = self.transcript_data[who_spoke]
+        self.phrase_text[who_spoke] = {"committed": text, "tentative": tentative}
+        text = f"{text} {tentative}".strip()
 
         if source_info["new_phrase"] or len(transcript) == 0:
             if len(transcript) > MAX_PHRASES:
@@ -137,18 +199,54 @@ class AudioTranscriber:
             transcript[0] = (f"{who_spoke}: [{text}]\n\n", time_spoken)
 
     def get_transcript(self):
-        combined_transcript = list(merge(
-            self.transcript_data["You"], self.transcript_data["Speaker"], 
-            key=lambda x: x[1], reverse=True))
+        with self.transcript_lock:
+            combined_transcript = list(merge(
+                self.transcript_data["You"], self.transcript_data["Speaker"],
+                key=lambda x: x[1], reverse=True))
         combined_transcript = combined_transcript[:MAX_PHRASES]
         return "".join([t[0] for t in combined_transcript])
     
+    def get_metrics(self):
+        latency = {}
+        for who_spoke, samples in self.latency.items():
+            samples = list(samples)
+            decode = sorted(sample[0] for sample in samples)
+            end_to_end = sorted(sample[1] for sample in samples)
+            latency[who_spoke] = {
+                "decodes": len(samples),
+                "decode_mean_seconds": round(sum(decode) / len(decode), 3) if decode else None,
+                "decode_p95_seconds": round(decode[int(0.95 * (len(decode) - 1))], 3) if decode else None,
+                "end_to_end_mean_seconds": round(sum(end_to_end) / len(end_to_end), 3) if end_to_end else None
+            }
+
+        return {
+            "decode_workers": self.decode_workers,
+            "schedulers": {name: scheduler.get_metrics() for name, scheduler in list(self.schedulers.items())},
+            "latency": latency,
+            "degraded_decodes": dict(self.degraded_decodes),
+            "segments": self.segment_filter.get_stats(),
+            "cache": {role: model.get_stats() for role, model in
+                      (("model", self.audio_model), ("fallback_model", self.fallback_model))
+                      if hasattr(model, "get_stats")},
+            "api": self.audio_model.get_request_stats() if hasattr(self.audio_model, "get_request_stats") else None,
+            "routing": self.audio_model.get_routing_stats() if hasattr(self.audio_model, "get_routing_stats") else None,
+            "workers": self.audio_model.get_worker_stats() if hasattr(self.audio_model, "get_worker_stats") else None,
+            "vad": {who_spoke: recorder.get_vad_stats() for who_spoke, recorder in self.recorders.items()
+                    if hasattr(recorder, "get_vad_stats")}
+        }
+
     def clear_transcript_data(self):
-        self.transcript_data["You"].clear()
-        self.transcript_data["Speaker"].clear()
+        with self.transcript_lock:
+            self.transcript_data["You"].clear()
+            self.transcript_data["Speaker"].clear()
 
-        self.audio_sources["You"]["last_sample"] = bytes()
-        self.audio_sources["Speaker"]["last_sample"] = bytes()
+        self.audio_sources["You"]["buffer"].clear()
+        self.audio_sources["Speaker"]["buffer"].clear()
 
         self.audio_sources["You"]["new_phrase"] = True
-        self.audio_sources["Speaker"]["new_phrase"] = True
\ No newline at end of file
+        self.audio_sources["Speaker"]["new_phrase"] = True
+
+        for who_spoke in self.audio_sources:
+            self.phrase_text[who_spoke] = {"committed": "", "tentative": ""}
+            if self.audio_sources[who_spoke]["decoder"]:
+                self.audio_sources[who_spoke]["decoder"].reset()
\ No newline at end of file
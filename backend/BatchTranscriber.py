@@ -0,0 +1,148 @@
+"""
+Transcribes a directory of recordings offline.
+
+Every file is replayed as fast as it can be read through ``ReplayRecorder``, so it is cut up by the same VAD and
+endpointing as live capture, and the chunks are grouped into phrases with the same ``PHRASE_TIMEOUT`` and maximum
+phrase length as ``AudioTranscriber``. Phrases are decoded by a pool of worker processes, each with its own
+``FasterWhisperTranscriber``, and written to a JSONL file with one line per phrase in file order. Throughput is
+reported in audio hours per wall-clock hour.
+
+Usage: python BatchTranscriber.py RECORDINGS_DIR [--output transcripts.jsonl] [--workers 2] [--model tiny.en]
+"""
+
+import argparse
+import json
+import os
+import queue
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from AudioFormat import BYTES_PER_SECOND, SAMPLE_RATE, SAMPLE_WIDTH
+from AudioRecorder import ReplayRecorder
+from AudioTranscriber import PHRASE_TIMEOUT, pcm_to_float32
+from PhraseBuffer import MAX_PHRASE_SECONDS
+
+AUDIO_EXTENSIONS = (".wav", ".aif", ".aiff", ".flac")
+REPLAY_START = datetime(2000, 1, 1)  # virtual clock origin; phrase times are reported as offsets into the file
+PENDING_PER_WORKER = 8  # phrases queued ahead per worker, so PCM for a whole archive is never held at once
+
+transcriber = None  # one per worker process, created by init_worker
+
+def find_recordings(directory):
+    return sorted(os.path.join(root, name) for root, _, names in os.walk(directory)
+                  for name in names if name.lower().endswith(AUDIO_EXTENSIONS))
+
+def split_phrases(path):
+    """Returns the recording's duration and its phrases as ``(start_seconds, end_seconds, pcm_bytes)``"""
+    recorder = ReplayRecorder(path, speed=None, start_time=REPLAY_START)
+    chunks = queue.Queue()
+    stop_listening = recorder.record_into_queue(chunks)
+    recorder.finished.wait()
+    stop_listening(wait_for_stop=True)
+
+    phrases = []
+    last_spoken = None
+    while not chunks.empty():
+        data, time_spoken = chunks.get()
+        end = (time_spoken - REPLAY_START).total_seconds()
+        start = end - len(data) / BYTES_PER_SECOND
+        # same rules as AudioTranscriber.update_last_sample_and_phrase_status
+        new_phrase = last_spoken is None or time_spoken - last_spoken > timedelta(seconds=PHRASE_TIMEOUT)
+        if not new_phrase and len(phrases[-1][2]) + len(data) > MAX_PHRASE_SECONDS * BYTES_PER_SECOND:
+            new_phrase = True
+        if new_phrase:
+            phrases.append([start, end, data])
+        else:
+            phrases[-1][1] = end
+            phrases[-1][2] += data
+        last_spoken = time_spoken
+    return recorder.source.DURATION, [tuple(phrase) for phrase in phrases]
+
+def init_worker(config):
+    global transcriber
+    from TranscriberModels import FasterWhisperTranscriber
+    transcriber = FasterWhisperTranscriber(config=config)
+
+def transcribe_phrase(data):
+    return transcriber.get_transcription(pcm_to_float32(data, SAMPLE_RATE, SAMPLE_WIDTH, 1))
+
+def transcribe_directory(directory, output, workers=2, config=None):
+    """Transcribes every recording under ``directory`` into ``output`` and returns the throughput report"""
+    recordings = find_recordings(directory)
+    if not recordings:
+        raise ValueError(f"no {'/'.join(AUDIO_EXTENSIONS)} files found in {directory}")
+
+    config = dict(config or {})
+    # split the cores between the workers instead of letting every model grab all of them
+    if not config.get("cpu_threads"):
+        config["cpu_threads"] = max(1, (os.cpu_count() or 1) // workers)
+
+    audio_seconds = 0.0
+    phrase_count = 0
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(config,)) as pool, \
+            open(output, "w") as out:
+        pending = deque()
+
+        def write_oldest():
+            path, phrase_start, phrase_end, future = pending.popleft()
+            text = future.result()
+            if text:
+                out.write(json.dumps({"file": os.path.relpath(path, directory), "start": round(phrase_start, 2),
+                                      "end": round(phrase_end, 2), "text": text}) + "\n")
+
+        # chunking runs here while the pool decodes the phrases of earlier files
+        for path in recordings:
+            try:
+                duration, phrases = split_phrases(path)
+            except Exception as e:
+                print(f"[WARN] Skipping {path}: {e}")
+                continue
+            audio_seconds += duration
+            phrase_count += len(phrases)
+            for phrase_start, phrase_end, data in phrases:
+                pending.append((path, phrase_start, phrase_end, pool.submit(transcribe_phrase, data)))
+                while len(pending) > workers * PENDING_PER_WORKER:
+                    write_oldest()
+            print(f"[INFO] Queued {len(phrases)} phrases from {path} ({duration:.0f}s)")
+        while pending:
+            write_oldest()
+    elapsed = time.perf_counter() - start
+
+    return {
+        "files": len(recordings),
+        "phrases": phrase_count,
+        "audio_hours": round(audio_seconds / 3600, 3),
+        "wall_hours": round(elapsed / 3600, 3),
+        "audio_hours_per_wall_hour": round(audio_seconds / elapsed, 2) if elapsed else None
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Transcribe a directory of recordings into JSONL")
+    parser.add_argument("directory", help="directory searched recursively for .wav/.aiff/.flac recordings")
+    parser.add_argument("--output", default="transcripts.jsonl", help="JSONL file with one line per phrase")
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 1) // 4),
+                        help="worker processes, each loading its own model")
+    parser.add_argument("--model", help="model size; defaults to the calibrated profile or tiny.en")
+    parser.add_argument("--beam-size", type=int, help="beam size; defaults to the calibrated profile or 5")
+    args = parser.parse_args()
+
+    from TranscriberModels import load_profile
+    config = load_profile() or {}
+    if args.model:
+        config["model_size"] = args.model
+    if args.beam_size:
+        config["beam_size"] = args.beam_size
+    config["num_workers"] = 1  # parallelism comes from the process pool
+
+    report = transcribe_directory(args.directory, args.output, args.workers, config)
+    print(f"[INFO] Transcribed {report['audio_hours']}h of audio in {report['wall_hours']}h "
+          f"({report['audio_hours_per_wall_hour']} audio hours per wall hour) into {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+import threading
+from AudioFormat import BYTES_PER_SECOND
+
+class CaptureHub:
+    """
+    Owns the recorder for one capture device and fans every chunk it records out to the queues of all subscribed
+    sessions, so opening more sessions doesn't reopen the device, recalibrate it or start more listener threads.
+
+    Every subscriber receives the same ``(pcm_bytes, time_spoken)`` tuple; nothing is copied per session. The device
+    is opened on the first subscription and closed again when the last subscriber leaves; the recorder, and with it
+    the noise calibration, is kept for the next time.
+    """
+
+    def __init__(self, name, recorder_factory):
+        self.name = name
+        self.recorder_factory = recorder_factory
+        self.recorder = None
+        self.stop_listening = None
+        self.closing = None  # stopper of a listener that was asked to stop but may still be finishing its phrase
+        self.lock = threading.Lock()
+        self.subscribers = ()  # replaced rather than mutated, so put() can iterate without the lock
+        self.chunks = 0
+        self.bytes = 0
+
+    @property
+    def is_open(self):
+        return self.stop_listening is not None
+
+    def subscribe(self, audio_queue):
+        """Starts delivering captured audio to ``audio_queue``, opening the device first if needed"""
+        with self.lock:
+            if self.recorder is None:
+                self.recorder = self.recorder_factory()
+            if self.stop_listening is None:
+                if self.closing is not None:
+                    self.closing(wait_for_stop=True)  # the old listener must release the device first
+                    self.closing = None
+                print(f"[INFO] Opening capture device {self.name}")
+                self.stop_listening = self.recorder.record_into_queue(self)
+            self.subscribers = self.subscribers + (audio_queue,)
+        return self.recorder
+
+    def unsubscribe(self, audio_queue, wait=False):
+        """Stops delivering to ``audio_queue``; with ``wait``, also waits for the device to close if this was the last subscriber"""
+        with self.lock:
+            self.subscribers = tuple(q for q in self.subscribers if q is not audio_queue)
+            if not self.subscribers and self.stop_listening is not None:
+                print(f"[INFO] Closing capture device {self.name}")
+                self.stop_listening(wait_for_stop=False)
+                self.closing, self.stop_listening = self.stop_listening, None
+            if wait and self.closing is not None:
+                # put() never takes the lock, so the listener can finish its phrase while we hold it
+                self.closing(wait_for_stop=True)
+                self.closing = None
+
+    def put(self, item):
+        """Called by the recorder's listener thread for every captured chunk"""
+        self.chunks += 1
+        self.bytes += len(item[0])
+        for audio_queue in self.subscribers:
+            audio_queue.put(item)
+
+    def get_stats(self):
+        return {
+            "device": self.name,
+            "open": self.is_open,
+            "subscribers": len(self.subscribers),
+            "chunks": self.chunks,
+            "captured_seconds": round(self.bytes / BYTES_PER_SECOND, 2)
+        }
@@ -1,14 +1,7 @@
 import threading
 import customtkinter as ctk
 from SearchEngine import SearchEngine
-from openai import OpenAI
-import os
-
-try:
-    from keys import OPENAI_API_KEY
-    client = OpenAI(api_key=OPENAI_API_KEY)
-except ImportError:
-    client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
+from OpenAIClient import get_client
 
 
 class DeepDiveWindow:
@@ -114,7 +107,7 @@ The queries should cover:
 
 Return only the queries, one per line."""
 
-            response = client.chat.completions.create(
+            response = get_client().chat.completions.create(
                 model="gpt-4o-mini",
                 messages=[{"role": "user", "content": prompt}],
                 temperature=0.4,
@@ -150,7 +143,7 @@ Provide:
 
 Format with clear sections. Be thorough but concise."""
 
-            response = client.chat.completions.create(
+            response = get_client().chat.completions.create(
                 model="gpt-4o-mini",
                 messages=[{"role": "user", "content": prompt}],
                 temperature=0.3,
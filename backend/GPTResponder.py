@@ -1,19 +1,10 @@
-from openai import OpenAI
-import os
+from OpenAIClient import get_client
 from prompts import create_prompt, create_research_prompt, INITIAL_RESPONSE
 import time
 from SearchEngine import SearchEngine
 from ActionTracker import ActionTracker
 import threading
 
-# Get API key from environment variable or keys.py file
-try:
-    from keys import OPENAI_API_KEY
-    client = OpenAI(api_key=OPENAI_API_KEY)
-except ImportError:
-    # Fallback to environment variable
-    client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
-
 def generate_response_from_transcript(transcript, research_data=None):
     """Generate response with optional research context"""
     try:
@@ -24,7 +15,7 @@ def generate_response_from_transcript(transcript, research_data=None):
             # Use standard prompt
             prompt = create_prompt(transcript)
 
-        response = client.chat.completions.create(
+        response = get_client().chat.completions.create(
                 model="gpt-4o-mini",
                 messages=[{"role": "system", "content": prompt}],
                 temperature=0.6,
@@ -59,6 +50,7 @@ class GPTResponder:
         self.research_queries = []  # Current research queries
         self.conversation_context = []  # Track conversation history
         self.action_tracker = ActionTracker()  # Track action items and insights
+        self.stop_event = threading.Event()
 
     def get_research_status(self):
         """Get current research activity for UI"""
@@ -67,7 +59,7 @@ class GPTResponder:
         return self.search_engine.get_current_activity()
 
     def respond_to_transcriber(self, transcriber):
-        while True:
+        while not self.stop_event.is_set():
             if transcriber.transcript_changed_event.is_set():
                 start_time = time.time()
 
@@ -100,9 +92,13 @@ class GPTResponder:
 
                 remaining_time = self.response_interval - execution_time
                 if remaining_time > 0:
-                    time.sleep(remaining_time)
+                    self.stop_event.wait(remaining_time)
             else:
-                time.sleep(0.3)
+                self.stop_event.wait(0.3)
+
+    def stop(self):
+        """Makes respond_to_transcriber return once any LLM call in flight has finished"""
+        self.stop_event.set()
 
     def update_response_interval(self, interval):
         self.response_interval = interval
@@ -0,0 +1,148 @@
+import threading
+import time
+from AudioFormat import SAMPLE_RATE
+
+LOCAL_RTF_PRIOR = 0.3  # decode seconds per audio second assumed for the local model until it has been measured
+API_LATENCY_PRIOR = 1.5  # seconds per request assumed for the API until it has been measured
+API_MARGIN = 1.5  # the API must be expected to answer this many times sooner before a phrase leaves the machine
+SMOOTHING = 0.2  # weight of the newest decode in the latency estimates
+FAILOVER_COOLDOWN = 30  # seconds a backend that raised is skipped before it gets traffic again
+
+class Backend:
+    def __init__(self, name, model):
+        self.name = name
+        self.model = model
+        self.in_flight = 0
+        self.routed = 0
+        self.errors = 0
+        self.failed_until = 0.0
+
+    @property
+    def healthy(self):
+        return time.monotonic() >= self.failed_until
+
+class HybridTranscriber:
+    """
+    Sends each phrase to the local model or to the API, whichever is expected to return it first.
+
+    The local model's latency grows with the audio it has to decode, so its estimate is its measured real-time
+    factor times the phrase plus the rest of the audio its scheduler drained or has queued since, scaled by the
+    decodes already running on it.
+    The API's latency is roughly flat per request. A phrase goes to the API only when that is expected to be
+    ``API_MARGIN`` times faster, which keeps quiet meetings local and moves bursts to the API as the local backlog
+    grows. A backend that raises is skipped for ``FAILOVER_COOLDOWN`` seconds and the phrase is retried on the other.
+
+    Phrases are routed whole, so this backend offers ``get_transcription`` and ``transcribe_segments`` but no
+    ``transcribe_words``; the transcriber re-decodes the phrase instead of streaming word timestamps.
+    """
+
+    def __init__(self, local_model, api_model):
+        self.local = Backend("local", local_model)
+        self.api = Backend("api", api_model)
+        self.local_rtf = LOCAL_RTF_PRIOR
+        self.api_latency = API_LATENCY_PRIOR
+        self.schedulers = []
+        self.lock = threading.Lock()
+        self.failovers = 0
+
+    def attach_scheduler(self, scheduler):
+        """Lets the router see how much audio is waiting to be decoded along with the phrase it is routing"""
+        with self.lock:
+            if scheduler not in self.schedulers:
+                self.schedulers.append(scheduler)
+
+    def detach_scheduler(self, scheduler):
+        with self.lock:
+            if scheduler in self.schedulers:
+                self.schedulers.remove(scheduler)
+
+    def backlog_seconds(self):
+        # measured from what each scheduler drained: its queues are empty by the time a phrase is routed
+        return sum(scheduler.backlog_seconds() for scheduler in list(self.schedulers))
+
+    def estimates(self, phrase_seconds):
+        local = self.local_rtf * (phrase_seconds + self.backlog_seconds()) * (1 + self.local.in_flight)
+        return local, self.api_latency
+
+    def choose(self, phrase_seconds):
+        if self.local.healthy != self.api.healthy:
+            return self.local if self.local.healthy else self.api
+        local_estimate, api_estimate = self.estimates(phrase_seconds)
+        return self.api if api_estimate * API_MARGIN < local_estimate else self.local
+
+    def get_transcription(self, audio):
+        try:
+            return self.decode(audio)
+        except Exception as e:
+            print(f"[WARN] Transcription failed on both backends: {e}")
+            return ''
+
+    def decode(self, audio):
+        """Same as ``get_transcription`` but raises once both backends have failed"""
+        return self.route(audio, lambda model: model.decode(audio))
+
+    def transcribe_segments(self, audio, word_timestamps=False, prompt=None):
+        return self.route(audio, lambda model: model.transcribe_segments(audio, word_timestamps, prompt))
+
+    def route(self, audio, decode):
+        phrase_seconds = len(audio) / SAMPLE_RATE
+        with self.lock:
+            backend = self.choose(phrase_seconds)
+        try:
+            return self.decode_with(backend, decode, phrase_seconds)
+        except Exception as e:
+            other = self.api if backend is self.local else self.local
+            print(f"[WARN] {backend.name} transcription failed ({e}); failing over to {other.name}")
+            with self.lock:
+                self.failovers += 1
+            # raises when the other backend fails too, so the cache never stores the failure as silence
+            return self.decode_with(other, decode, phrase_seconds)
+
+    def decode_with(self, backend, decode, phrase_seconds):
+        with self.lock:
+            backend.in_flight += 1
+            backend.routed += 1
+        start = time.perf_counter()
+        try:
+            result = decode(backend.model)
+        except Exception:
+            with self.lock:
+                backend.errors += 1
+                backend.failed_until = time.monotonic() + FAILOVER_COOLDOWN
+            raise
+        finally:
+            with self.lock:
+                backend.in_flight -= 1
+
+        latency = time.perf_counter() - start
+        with self.lock:
+            if backend is self.local and phrase_seconds > 0:
+                self.local_rtf += (latency / phrase_seconds - self.local_rtf) * SMOOTHING
+            elif backend is self.api:
+                self.api_latency += (latency - self.api_latency) * SMOOTHING
+        return result
+
+    def get_request_stats(self):
+        return self.api.model.get_request_stats()
+
+    def get_routing_stats(self):
+        with self.lock:
+            return {
+                "local_rtf": round(self.local_rtf, 3),
+                "api_latency_seconds": round(self.api_latency, 3),
+                "backlog_seconds": round(self.backlog_seconds(), 2),
+                "failovers": self.failovers,
+                "backends": {
+                    backend.name: {
+                        "routed": backend.routed,
+                        "errors": backend.errors,
+                        "in_flight": backend.in_flight,
+                        "healthy": backend.healthy
+                    }
+                    for backend in (self.local, self.api)
+                }
+            }
+
+    def close(self):
+        self.local.model.close()
+        self.api.model.close()
@@ -0,0 +1,60 @@
+import builtins
+import sys
+import threading
+import time
+
+REPORT_LIMIT = 8  # slowest imports listed in the startup report
+REPORT_MIN_SECONDS = 0.01  # imports faster than this are left out of the report
+
+class ImportProfiler:
+    """
+    Times the imports an entry point makes while it starts, so slow dependencies show up in the startup log.
+
+    Only the imports made directly by the profiled code are timed; everything they import in turn counts toward
+    them, so the report reads like the entry point's own import list. Modules already loaded cost nothing and are
+    skipped. For a full tree, run Python with ``-X importtime`` instead.
+    """
+
+    def __init__(self):
+        self.times = {}
+        self.depth = threading.local()
+        self.original_import = None
+        self.started = None
+        self.elapsed = None
+
+    def start(self):
+        self.original_import = builtins.__import__
+        builtins.__import__ = self.timed_import
+        self.started = time.perf_counter()
+        return self
+
+    def stop(self):
+        builtins.__import__ = self.original_import
+        self.elapsed = time.perf_counter() - self.started
+        return self
+
+    def timed_import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        depth = getattr(self.depth, "value", 0)
+        if depth or level or name in sys.modules:
+            return self.original_import(name, globals, locals, fromlist, level)
+        self.depth.value = depth + 1
+        start = time.perf_counter()
+        try:
+            return self.original_import(name, globals, locals, fromlist, level)
+        finally:
+            self.depth.value = depth
+            self.times[name] = self.times.get(name, 0.0) + time.perf_counter() - start
+
+    def slowest(self, limit=REPORT_LIMIT):
+        ranked = sorted(self.times.items(), key=lambda item: item[1], reverse=True)
+        return [(name, seconds) for name, seconds in ranked[:limit] if seconds >= REPORT_MIN_SECONDS]
+
+    def report(self):
+        slowest = ", ".join(f"{name} {seconds:.2f}s" for name, seconds in self.slowest())
+        print(f"[INFO] Imports took {self.elapsed:.2f}s" + (f"; slowest: {slowest}" if slowest else ""))
+
+    def get_stats(self):
+        return {
+            "import_seconds": round(self.elapsed, 3) if self.elapsed is not None else None,
+            "slowest": {name: round(seconds, 3) for name, seconds in self.slowest()}
+        }
@@ -0,0 +1,398 @@
+import atexit
+import json
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from multiprocessing import shared_memory
+import numpy as np
+from ModelRegistry import MODEL_TTL
+from AudioFormat import SAMPLE_RATE
+
+RING_SECONDS = 90  # per worker; room for PIPELINE_DEPTH full 30 s phrases plus slack
+PIPELINE_DEPTH = 2  # windows queued per worker, so the next one is copied in while the current one decodes
+MAX_RESTART_DELAY = 30  # seconds; restarts back off exponentially while a worker keeps crashing
+
+def default_worker_processes():
+    """One worker process per four cores, each decoding with the cores it was given"""
+    return max(1, (os.cpu_count() or 1) // 4)
+
+def read_window(ring, start, length):
+    end = start + length
+    if end <= len(ring):
+        return ring[start:end].copy()
+    return np.concatenate((ring[start:], ring[:end - len(ring)]))
+
+def worker_main(config, shm_name, connection):
+    """Entry point of a worker process: decodes the windows the pool points it at until told to stop"""
+    from TranscriberModels import FasterWhisperTranscriber
+
+    shm = shared_memory.SharedMemory(name=shm_name)  # owned and unlinked by the pool
+    ring = np.ndarray((shm.size // 4,), dtype=np.float32, buffer=shm.buf)
+    transcriber = FasterWhisperTranscriber(config=config)
+    connection.send((None, True, os.getpid()))  # ready
+
+    while True:
+        try:
+            message = connection.recv()
+        except EOFError:
+            break
+        if message is None:
+            break
+        request_id, method, start, length, kwargs = message
+        audio = read_window(ring, start, length)
+        try:
+            connection.send((request_id, True, getattr(transcriber, method)(audio, **kwargs)))
+        except Exception as e:
+            connection.send((request_id, False, repr(e)))
+
+    transcriber.close()
+    del ring
+    shm.close()
+
+class PendingRequest:
+    def __init__(self, request_id, length):
+        self.request_id = request_id
+        self.length = length
+        self.done = threading.Event()
+        self.ok = False
+        self.result = None
+
+    def resolve(self, ok, result):
+        self.ok, self.result = ok, result
+        self.done.set()
+
+class InferenceWorker:
+    """One worker process, the shared-memory ring its audio windows are written to and the pipe that controls it"""
+
+    def __init__(self, pool, index):
+        self.pool = pool
+        self.index = index
+        self.capacity = int(RING_SECONDS * SAMPLE_RATE)
+        self.shm = shared_memory.SharedMemory(create=True, size=self.capacity * 4)
+        self.ring = np.ndarray((self.capacity,), dtype=np.float32, buffer=self.shm.buf)
+        self.pending = deque()  # requests in the order the worker will answer them
+        self.reserved = 0  # slots handed out by the pool whose requests haven't been submitted yet
+        self.send_lock = threading.Lock()
+        self.write_position = 0
+        self.pid = None
+        self.restarts = 0
+        self.crashes_in_a_row = 0
+        self.requests = 0
+        self.start()
+
+    def start(self):
+        self.connection, child_connection = self.pool.context.Pipe()
+        self.process = self.pool.context.Process(target=worker_main, name=f"inference-worker-{self.index}",
+                                                 args=(self.pool.config, self.shm.name, child_connection))
+        self.process.daemon = True
+        self.process.start()
+        child_connection.close()  # so recv() raises EOFError as soon as the child dies
+        self.reader = threading.Thread(target=self.read_replies, name=f"inference-reader-{self.index}")
+        self.reader.daemon = True
+        self.reader.start()
+
+    @property
+    def alive(self):
+        return self.process.is_alive()
+
+    def submit(self, request_id, method, audio, kwargs):
+        """Copies ``audio`` into the ring and queues it; the pool guarantees there is room"""
+        request = PendingRequest(request_id, len(audio))
+        with self.send_lock:
+            start = self.write_position % self.capacity
+            end = start + len(audio)
+            if end <= self.capacity:
+                self.ring[start:end] = audio
+            else:
+                split = self.capacity - start
+                self.ring[start:] = audio[:split]
+                self.ring[:end - self.capacity] = audio[split:]
+            self.write_position += len(audio)
+            self.pending.append(request)  # before sending, so the reply always finds it
+            try:
+                self.connection.send((request_id, method, start, len(audio), kwargs))
+            except OSError:
+                self.pending.remove(request)
+                request.resolve(False, f"inference worker {self.index} is restarting")
+        with self.pool.condition:
+            self.reserved -= 1  # the request is in ``pending`` now, or has failed
+        return request
+
+    def queued_samples(self):
+        return sum(request.length for request in list(self.pending))
+
+    def read_replies(self):
+        while True:
+            try:
+                request_id, ok, result = self.connection.recv()
+            except (EOFError, OSError):
+                break
+            if request_id is None:
+                self.pid = result
+                print(f"[INFO] Inference worker {self.index} ready (pid {result})")
+                continue
+            request = self.pending.popleft()  # replies come back in submission order
+            self.requests += 1
+            self.crashes_in_a_row = 0
+            request.resolve(ok, result)
+            self.pool.slot_freed()
+
+        # the worker exited; fail what it still had and start a replacement unless the pool is closing
+        with self.send_lock:
+            while self.pending:
+                self.pending.popleft().resolve(False, f"inference worker {self.index} exited")
+            self.write_position = 0
+        self.pool.slot_freed()
+        if self.pool.closed:
+            return
+        self.process.join()
+        delay = min(MAX_RESTART_DELAY, 2 ** self.crashes_in_a_row - 1)
+        print(f"[WARN] Inference worker {self.index} exited with code {self.process.exitcode}; restarting in {delay}s")
+        self.crashes_in_a_row += 1
+        self.restarts += 1
+        time.sleep(delay)
+        if not self.pool.closed:
+            self.start()
+
+    def stop(self, timeout=5):
+        try:
+            self.connection.send(None)
+        except OSError:
+            pass
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join()
+        self.connection.close()
+        del self.ring
+        self.shm.close()
+        self.shm.unlink()
+
+class InferenceWorkerPool:
+    """
+    Runs faster-whisper in separate worker processes so decoding never competes with the server, UI and capture
+    threads for the GIL.
+
+    Every worker has a shared-memory ring of float32 samples: audio windows are copied into it once and only
+    ``(request_id, method, offset, length)`` control messages and the small results go over the worker's pipe. Each
+    worker takes up to ``PIPELINE_DEPTH`` windows at a time and gets an equal share of the cores. A worker that dies
+    fails only the requests it held and is restarted, backing off while it keeps crashing.
+
+    Offers the same interface as ``FasterWhisperTranscriber``.
+    """
+
+    def __init__(self, processes=None, config=None):
+        from TranscriberModels import load_profile, DEFAULT_CONFIG
+        processes = processes or default_worker_processes()
+        if config is None:
+            config = load_profile()
+        config = dict(DEFAULT_CONFIG, **(config or {}))
+        config["num_workers"] = 1  # parallelism comes from the processes
+        if not config["cpu_threads"]:
+            config["cpu_threads"] = max(1, (os.cpu_count() or 1) // processes)
+        self.config = config
+        self.beam_size = config["beam_size"]
+
+        # fork would copy the capture and server threads' locks in whatever state they are in
+        self.context = multiprocessing.get_context("spawn")
+        self.closed = False
+        self.condition = threading.Condition()
+        self.next_request_id = 0
+        print(f"[INFO] Starting {processes} inference worker processes ({config['cpu_threads']} threads each)")
+        self.workers = [InferenceWorker(self, index) for index in range(processes)]
+
+    def slot_freed(self):
+        with self.condition:
+            self.condition.notify_all()
+
+    def acquire_worker(self):
+        with self.condition:
+            while True:
+                if self.closed:
+                    raise RuntimeError("inference worker pool is closed")
+                ready = [w for w in self.workers if w.alive and len(w.pending) + w.reserved < PIPELINE_DEPTH]
+                if ready:
+                    # reserve the slot before releasing the lock, or concurrent callers could all pick this worker
+                    # and overwrite ring data it hasn't read yet
+                    worker = min(ready, key=lambda w: w.queued_samples())
+                    worker.reserved += 1
+                    self.next_request_id += 1
+                    return worker, self.next_request_id
+                self.condition.wait()
+
+    def call(self, method, audio, **kwargs):
+        audio = np.asarray(audio, dtype=np.float32)
+        if len(audio) * PIPELINE_DEPTH > RING_SECONDS * SAMPLE_RATE:
+            raise ValueError(f"audio window of {len(audio) / SAMPLE_RATE:.1f}s is longer than the worker ring "
+                             f"allows ({RING_SECONDS / PIPELINE_DEPTH:.0f}s)")
+        worker, request_id = self.acquire_worker()
+        request = worker.submit(request_id, method, audio, kwargs)
+        request.done.wait()
+        if not request.ok:
+            raise RuntimeError(request.result)
+        return request.result
+
+    def decode(self, audio):
+        return self.call("decode", audio)
+
+    def transcribe_segments(self, audio, word_timestamps=False, prompt=None):
+        return self.call("transcribe_segments", audio, word_timestamps=word_timestamps, prompt=prompt)
+
+    def get_transcription(self, audio):
+        try:
+            return self.decode(audio)
+        except Exception as e:
+            print(e)
+            return ''
+
+    def transcribe_words(self, audio, prompt=None):
+        try:
+            return [word for segment in self.transcribe_segments(audio, True, prompt) for word in segment.words]
+        except Exception as e:
+            print(e)
+            return []
+
+    def get_worker_stats(self):
+        return [
+            {
+                "worker": worker.index,
+                "pid": worker.pid,
+                "alive": worker.alive,
+                "pending": len(worker.pending),
+                "requests": worker.requests,
+                "restarts": worker.restarts
+            }
+            for worker in self.workers
+        ]
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+        for worker in self.workers:
+            worker.stop()
+
+class PoolEntry:
+    """One running worker pool shared by every handle with the same process count and config"""
+    def __init__(self, key):
+        self.key = key
+        self.pool = None
+        self.refcount = 0
+        self.idle_since = None
+        self.start_lock = threading.Lock()
+
+class PoolHandle:
+    """Reference-counted handle to a shared worker pool; ``close`` releases it instead of stopping the workers"""
+    def __init__(self, registry, entry):
+        self.registry = registry
+        self.entry = entry
+        self.released = False
+
+    def __getattr__(self, name):
+        if name == "entry":
+            raise AttributeError(name)
+        return getattr(self.entry.pool, name)
+
+    def close(self):
+        if not self.released:
+            self.released = True
+            self.registry.release(self.entry)
+
+class WorkerPoolRegistry:
+    """
+    Starts each (processes, config) worker pool once per process and stops it after ``ttl`` idle seconds.
+
+    Every worker process holds its own copy of the weights, so sessions share one pool the way ``ModelRegistry``
+    shares in-process models, instead of each starting its own set of processes.
+    """
+
+    def __init__(self, ttl=MODEL_TTL):
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.entries = {}
+        self.reaper = None
+        self.reaper_wakeup = threading.Event()
+
+    def acquire(self, processes=None, config=None):
+        processes = processes or default_worker_processes()
+        key = (processes, json.dumps(config, sort_keys=True))
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                entry = self.entries[key] = PoolEntry(key)
+            entry.refcount += 1
+            entry.idle_since = None
+
+        # start outside the registry lock, spawning the workers and loading their models takes a while
+        with entry.start_lock:
+            if entry.pool is None:
+                try:
+                    entry.pool = InferenceWorkerPool(processes, config)
+                except Exception:
+                    self.release(entry)
+                    raise
+        return PoolHandle(self, entry)
+
+    def release(self, entry):
+        with self.lock:
+            entry.refcount -= 1
+            if entry.refcount == 0:
+                entry.idle_since = time.monotonic()
+                self.start_reaper()
+
+    def start_reaper(self):
+        if self.reaper is None or not self.reaper.is_alive():
+            self.reaper = threading.Thread(target=self.reap_idle_pools)
+            self.reaper.daemon = True
+            self.reaper.start()
+
+    def reap_idle_pools(self):
+        while True:
+            self.reaper_wakeup.wait(max(1, self.ttl / 2))
+            self.reaper_wakeup.clear()
+            with self.lock:
+                now = time.monotonic()
+                idle = [entry for entry in self.entries.values()
+                        if entry.refcount == 0 and entry.idle_since is not None and now - entry.idle_since >= self.ttl]
+                for entry in idle:
+                    del self.entries[entry.key]
+                done = not self.entries
+                if done:
+                    self.reaper = None
+            # stopping joins the worker processes, so do it outside the lock
+            for entry in idle:
+                print(f"[INFO] Stopping idle inference worker pool ({entry.key[0]} processes)")
+                self.stop_pool(entry)
+            if done:
+                return
+
+    def stop_pool(self, entry):
+        with entry.start_lock:
+            if entry.pool is not None:
+                entry.pool.close()
+                entry.pool = None
+
+    def close_all(self):
+        """Stops every pool, whether or not it still has handles; registered to run at exit"""
+        with self.lock:
+            entries = list(self.entries.values())
+            self.entries.clear()
+        for entry in entries:
+            self.stop_pool(entry)
+
+    def get_stats(self):
+        with self.lock:
+            now = time.monotonic()
+            return [
+                {
+                    "processes": entry.key[0],
+                    "handles": entry.refcount,
+                    "idle_seconds": round(now - entry.idle_since, 1) if entry.idle_since is not None else None
+                }
+                for entry in self.entries.values()
+            ]
+
+pools = WorkerPoolRegistry()
+atexit.register(pools.close_all)  # unlinks the shared-memory rings of pools still idling at exit
@@ -0,0 +1,120 @@
+import threading
+import time
+
+MODEL_TTL = 300  # seconds an unused model stays loaded before it is unloaded
+
+class ModelEntry:
+    """One loaded WhisperModel shared by every handle with the same model, device, compute type and thread settings"""
+    def __init__(self, key, num_workers):
+        self.key = key
+        self.model = None
+        self.refcount = 0
+        self.idle_since = None
+        self.load_lock = threading.Lock()
+        # ctranslate2 runs up to num_workers transcriptions in parallel; more callers just queue inside it
+        self.inference_slots = threading.Semaphore(num_workers)
+        self.num_workers = num_workers
+
+class ModelHandle:
+    """Reference-counted handle to a shared model; call ``release`` when the owner is done with it"""
+    def __init__(self, registry, entry):
+        self.registry = registry
+        self.entry = entry
+        self.released = False
+
+    def transcribe(self, audio, **kwargs):
+        """Same as ``WhisperModel.transcribe`` but thread-safe, and the segments are returned as a list"""
+        with self.entry.inference_slots:
+            segments, info = self.entry.model.transcribe(audio, **kwargs)
+            # segments are decoded lazily, so consume them while holding the slot
+            return list(segments), info
+
+    def release(self):
+        if not self.released:
+            self.released = True
+            self.registry.release(self.entry)
+
+class ModelRegistry:
+    """Loads each model configuration once per process and unloads it after ``ttl`` idle seconds"""
+
+    def __init__(self, ttl=MODEL_TTL):
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.entries = {}
+        self.reaper = None
+        self.reaper_wakeup = threading.Event()
+
+    def acquire(self, model_size, device, compute_type, cpu_threads=0, num_workers=1):
+        # thread settings are fixed when the model loads, so callers asking for different ones get their own model
+        key = (model_size, device, compute_type, cpu_threads, num_workers)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                entry = self.entries[key] = ModelEntry(key, num_workers)
+            entry.refcount += 1
+            entry.idle_since = None
+
+        # load outside the registry lock so other models can be acquired meanwhile
+        with entry.load_lock:
+            if entry.model is None:
+                try:
+                    from faster_whisper import WhisperModel  # imported on first load, it pulls in ctranslate2 and onnxruntime
+                    print(f"[INFO] Loading Faster Whisper model {model_size} ({device}, {compute_type})...")
+                    entry.model = WhisperModel(model_size, device=device, compute_type=compute_type,
+                                               cpu_threads=cpu_threads, num_workers=num_workers)
+                except Exception:
+                    self.release(entry)
+                    raise
+        return ModelHandle(self, entry)
+
+    def release(self, entry):
+        with self.lock:
+            entry.refcount -= 1
+            if entry.refcount == 0:
+                entry.idle_since = time.monotonic()
+                self.start_reaper()
+
+    def start_reaper(self):
+        if self.reaper is None or not self.reaper.is_alive():
+            self.reaper = threading.Thread(target=self.reap_idle_models)
+            self.reaper.daemon = True
+            self.reaper.start()
+
+    def reap_idle_models(self):
+        while True:
+            self.reaper_wakeup.wait(max(1, self.ttl / 2))
+            self.reaper_wakeup.clear()
+            with self.lock:
+                now = time.monotonic()
+                for key, entry in list(self.entries.items()):
+                    if entry.refcount == 0 and entry.idle_since is not None and now - entry.idle_since >= self.ttl:
+                        print(f"[INFO] Unloading idle Faster Whisper model {key[0]} ({key[1]}, {key[2]})")
+                        del self.entries[key]
+                if not self.entries:
+                    self.reaper = None
+                    return
+
+    def unload_unused(self):
+        """Unloads every model without handles right away instead of waiting for the TTL"""
+        with self.lock:
+            for key, entry in list(self.entries.items()):
+                if entry.refcount == 0:
+                    del self.entries[key]
+
+    def get_stats(self):
+        with self.lock:
+            now = time.monotonic()
+            return [
+                {
+                    "model": entry.key[0],
+                    "device": entry.key[1],
+                    "compute_type": entry.key[2],
+                    "cpu_threads": entry.key[3],
+                    "num_workers": entry.num_workers,
+                    "handles": entry.refcount,
+                    "idle_seconds": round(now - entry.idle_since, 1) if entry.idle_since is not None else None
+                }
+                for entry in self.entries.values()
+            ]
+
+registry = ModelRegistry()
@@ -0,0 +1,94 @@
+import json
+import os
+import threading
+import time
+from custom_speech_recognition import dsp
+
+CALIBRATION_PATH = os.path.join(os.path.expanduser("~"), ".ecoute", "noise_calibration.json")
+RECALIBRATION_INTERVAL = 30  # seconds between threshold updates from the background thread
+NOISE_TIME_CONSTANT = 60  # seconds of non-speech audio the noise estimate averages over
+ENERGY_RATIO = 1.5  # same margin above the noise floor as Recognizer.dynamic_energy_ratio
+MIN_ENERGY_THRESHOLD = 100  # digital silence would otherwise drive the threshold to zero
+
+calibration_lock = threading.Lock()
+
+def calibration_key(device_name, sample_rate):
+    return f"{device_name}@{sample_rate}"
+
+def load_calibrations(path=CALIBRATION_PATH):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def load_calibration(device_name, sample_rate, path=CALIBRATION_PATH):
+    """Returns the cached energy threshold for this device, or None if it has never been calibrated"""
+    entry = load_calibrations(path).get(calibration_key(device_name, sample_rate))
+    return entry["energy_threshold"] if entry else None
+
+def save_calibration(device_name, sample_rate, energy_threshold, path=CALIBRATION_PATH):
+    # both recorders save from their own threads; read-modify-write the shared file one at a time
+    with calibration_lock:
+        calibrations = load_calibrations(path)
+        calibrations[calibration_key(device_name, sample_rate)] = {
+            "energy_threshold": round(energy_threshold, 1),
+            "updated": time.strftime("%Y-%m-%dT%H:%M:%S")
+        }
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = path + ".tmp"
+        with open(temp_path, "w") as f:
+            json.dump(calibrations, f, indent=2)
+        os.replace(temp_path, path)
+
+class NoiseCalibrator:
+    """
+    Keeps a recorder's energy threshold tracking the room while it listens.
+
+    ``observe`` is called by the listener thread with every block heard while no phrase is in progress and folds its
+    energy into a running noise estimate; a background thread applies ``ENERGY_RATIO`` times that estimate to the
+    recorder every ``RECALIBRATION_INTERVAL`` seconds and persists it, so the next start can skip calibration.
+    """
+
+    def __init__(self, recorder, path=CALIBRATION_PATH):
+        self.recorder = recorder
+        self.path = path
+        self.noise_energy = None
+        self.observed_seconds = 0.0
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def observe(self, buffer, sample_rate, sample_width):
+        seconds = len(buffer) / (sample_rate * sample_width)
+        energy = dsp.rms(buffer, sample_width)
+        if self.noise_energy is None:
+            self.noise_energy = float(energy)
+        else:
+            weight = min(1.0, seconds / NOISE_TIME_CONSTANT)
+            self.noise_energy += (energy - self.noise_energy) * weight
+        self.observed_seconds += seconds
+
+    def start(self):
+        if self.thread is None or not self.thread.is_alive():
+            self.stop_event.clear()
+            self.thread = threading.Thread(target=self.run)
+            self.thread.daemon = True
+            self.thread.start()
+
+    def stop(self, wait=True):
+        self.stop_event.set()
+        if wait and self.thread is not None:
+            self.thread.join()
+
+    def run(self):
+        while not self.stop_event.wait(RECALIBRATION_INTERVAL):
+            self.recalibrate()
+
+    def recalibrate(self):
+        # wait for a few seconds of quiet before trusting the estimate
+        if self.noise_energy is None or self.observed_seconds < 5:
+            return
+        threshold = max(MIN_ENERGY_THRESHOLD, self.noise_energy * ENERGY_RATIO)
+        self.recorder.set_energy_threshold(threshold)
+        if self.recorder.device_name:
+            save_calibration(self.recorder.device_name, self.recorder.source.SAMPLE_RATE, threshold, self.path)
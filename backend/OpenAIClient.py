@@ -0,0 +1,26 @@
+import os
+import threading
+
+client = None
+client_lock = threading.Lock()
+
+def get_api_key():
+    try:
+        from keys import OPENAI_API_KEY
+        return OPENAI_API_KEY
+    except ImportError:
+        return os.environ.get("OPENAI_API_KEY")
+
+def get_client():
+    """
+    The OpenAI client shared by the responder, search, action tracker and deep dives.
+
+    Created on first use: importing ``openai`` takes around a second, which would otherwise be paid by every
+    process that imports one of those modules before it can do anything.
+    """
+    global client
+    with client_lock:
+        if client is None:
+            from openai import OpenAI
+            client = OpenAI(api_key=get_api_key())
+        return client
@@ -0,0 +1,43 @@
+import numpy as np
+from AudioFormat import SAMPLE_RATE
+
+MAX_PHRASE_SECONDS = 30
+
+class PhraseBuffer:
+    """Preallocated float32 buffer holding the current phrase of one audio source.
+
+    Appends copy each chunk into free space once, so the cost per chunk stays flat however long the
+    phrase gets. When a phrase reaches ``max_seconds`` the write position wraps back to the start and a
+    new phrase begins, which keeps memory bounded while someone speaks without pausing.
+    """
+
+    def __init__(self, max_seconds=MAX_PHRASE_SECONDS, sample_rate=SAMPLE_RATE):
+        self.sample_rate = sample_rate
+        self.capacity = int(max_seconds * sample_rate)
+        self.data = np.zeros(self.capacity, dtype=np.float32)
+        self.length = 0
+
+    def __len__(self):
+        return self.length
+
+    @property
+    def duration(self):
+        return self.length / self.sample_rate
+
+    def append(self, samples):
+        """Appends samples and returns True if the buffer rolled over into a new phrase"""
+        rolled_over = False
+        if self.length + len(samples) > self.capacity:
+            self.length = 0
+            rolled_over = True
+        samples = samples[-self.capacity:]
+        self.data[self.length:self.length + len(samples)] = samples
+        self.length += len(samples)
+        return rolled_over
+
+    def view(self, start=0):
+        """Returns a zero-copy view of the phrase from sample ``start`` onwards"""
+        return self.data[min(start, self.length):self.length]
+
+    def clear(self):
+        self.length = 0
@@ -0,0 +1,53 @@
+import os
+import sys
+import threading
+import time
+
+IDLE_CPU_PERCENT = 5.0  # process CPU use below which the pipeline counts as stopped
+SAMPLE_INTERVAL = 1.0
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+def rss_mb():
+    """Resident memory of this process in MB, or None if it can't be read on this platform"""
+    if psutil is not None:
+        return psutil.Process().memory_info().rss / 2**20
+    if sys.platform.startswith("linux"):
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    return None
+
+def snapshot(interval=SAMPLE_INTERVAL):
+    """Thread count, resident memory and CPU use of this process, averaged over ``interval`` seconds"""
+    cpu_start, wall_start = time.process_time(), time.perf_counter()
+    time.sleep(interval)
+    cpu_percent = 100 * (time.process_time() - cpu_start) / (time.perf_counter() - wall_start)
+    rss = rss_mb()
+    return {
+        "threads": threading.active_count(),
+        "thread_names": sorted(thread.name for thread in threading.enumerate()),
+        "rss_mb": round(rss, 1) if rss is not None else None,
+        "cpu_percent": round(cpu_percent, 1)
+    }
+
+def compare(baseline, current):
+    """
+    Reports what a stopped session left behind relative to ``baseline``. The process has settled once it runs no
+    more threads than before and is idle again; memory is reported but not judged, because loaded models are kept
+    by the ModelRegistry for reuse and freed memory isn't always returned to the OS.
+    """
+    leftover = sorted(set(current["thread_names"]) - set(baseline["thread_names"]))
+    rss_delta = None
+    if baseline["rss_mb"] is not None and current["rss_mb"] is not None:
+        rss_delta = round(current["rss_mb"] - baseline["rss_mb"], 1)
+    return {
+        "baseline": baseline,
+        "after_stop": current,
+        "thread_delta": current["threads"] - baseline["threads"],
+        "leftover_threads": leftover,
+        "rss_delta_mb": rss_delta,
+        "settled": current["threads"] <= baseline["threads"] and current["cpu_percent"] <= IDLE_CPU_PERCENT
+    }
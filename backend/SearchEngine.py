@@ -1,16 +1,9 @@
 import threading
 import time
 from typing import List, Dict, Optional
-from openai import OpenAI
-import os
+from OpenAIClient import get_client
 import re
 
-try:
-    from keys import OPENAI_API_KEY
-    client = OpenAI(api_key=OPENAI_API_KEY)
-except ImportError:
-    client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
-
 
 class SearchResult:
     """Represents a single search result with source information"""
@@ -82,7 +75,7 @@ Be specific and focused. Examples:
 - "difference between REST and GraphQL"
 """
 
-            response = client.chat.completions.create(
+            response = get_client().chat.completions.create(
                 model="gpt-4o-mini",
                 messages=[{"role": "user", "content": prompt}],
                 temperature=0.3,
@@ -128,7 +121,7 @@ Provide a comprehensive answer based on reliable sources. Include:
 
 Format your response as factual information that could be cited."""
 
-            response = client.chat.completions.create(
+            response = get_client().chat.completions.create(
                 model="gpt-4o-mini",
                 messages=[{"role": "user", "content": prompt}],
                 temperature=0.2,
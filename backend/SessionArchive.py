@@ -0,0 +1,175 @@
+import json
+import os
+import queue
+import threading
+import wave
+from datetime import datetime, timedelta
+import numpy as np
+from AudioFormat import SAMPLE_RATE, SAMPLE_WIDTH
+
+try:
+    import soundfile
+except ImportError:
+    soundfile = None
+
+CHUNK_SECONDS = 60  # audio per archive file; bounds how much has to be decoded to reach any point
+FORMATS = {
+    # name: (extension, soundfile format, soundfile subtype)
+    "flac": ("flac", "FLAC", "PCM_16"),
+    "opus": ("opus", "OGG", "OPUS"),
+    "wav": ("wav", None, None),
+}
+
+class ArchiveChannel:
+    """Queue-like sink for one audio channel; subscribe it to a ``CaptureHub`` or put chunks on it directly"""
+
+    def __init__(self, archive, name, chunk_index=0):
+        self.archive = archive
+        self.name = name
+        self.buffer = bytearray()
+        self.segments = []  # [start_time, sample_offset, sample_count] of each phrase in the buffer
+        self.chunk_index = chunk_index
+
+    def put(self, item):
+        self.archive.pending.put((self, item[0], item[1]))
+
+class SessionArchive:
+    """
+    Streams the audio of every channel of a session to disk in compressed chunks of ``chunk_seconds``.
+
+    Captured audio is a series of phrases with silence trimmed out, so each chunk file holds the phrases back to back
+    and ``index.jsonl`` records where every phrase starts in time and in the file. ``read`` uses that index to decode
+    only the parts of the chunks that overlap the requested range.
+
+    Encoding runs on a writer thread so capture never waits for the disk. FLAC and Opus use ``soundfile``; without
+    it the archive falls back to uncompressed WAV chunks.
+    """
+
+    def __init__(self, directory, format="flac", chunk_seconds=CHUNK_SECONDS):
+        assert format in FORMATS, f"format must be one of {', '.join(FORMATS)}"
+        if format != "wav" and soundfile is None:
+            print(f"[WARN] soundfile is not installed; archiving {directory} as WAV instead of {format}")
+            format = "wav"
+        self.directory = directory
+        self.format = format
+        self.chunk_samples = int(chunk_seconds * SAMPLE_RATE)
+        self.index_path = os.path.join(directory, "index.jsonl")
+        os.makedirs(directory, exist_ok=True)
+
+        self.channels = {}
+        self.index_lock = threading.Lock()
+        self.pending = queue.Queue()
+        self.archived_seconds = 0.0
+        self.writer = threading.Thread(target=self.write_pending, name="session-archive")
+        self.writer.daemon = True
+        self.writer.start()
+
+    def channel(self, name):
+        if name not in self.channels:
+            # a restarted session appends to its archive instead of overwriting the earlier chunks
+            chunk_index = sum(1 for entry in load_index(self.index_path) if entry["channel"] == name)
+            self.channels[name] = ArchiveChannel(self, name, chunk_index)
+        return self.channels[name]
+
+    def write_pending(self):
+        while True:
+            item = self.pending.get()
+            if item is None:
+                break
+            channel, data, time_spoken = item
+            self.append(channel, data, time_spoken)
+
+        for channel in self.channels.values():
+            self.flush(channel)
+
+    def append(self, channel, data, time_spoken):
+        sample_count = len(data) // SAMPLE_WIDTH
+        # recorders stamp each chunk with the time its kept audio ends, so the phrase starts its length earlier
+        start_time = time_spoken - timedelta(seconds=sample_count / SAMPLE_RATE)
+        channel.segments.append([start_time, len(channel.buffer) // SAMPLE_WIDTH, sample_count])
+        channel.buffer += data
+        self.archived_seconds += sample_count / SAMPLE_RATE
+        if len(channel.buffer) // SAMPLE_WIDTH >= self.chunk_samples:
+            self.flush(channel)
+
+    def flush(self, channel):
+        if not channel.buffer:
+            return
+        extension, sf_format, subtype = FORMATS[self.format]
+        file_name = f"{channel.name}-{channel.chunk_index:06d}.{extension}"
+        path = os.path.join(self.directory, file_name)
+        if sf_format is None:
+            with wave.open(path, "wb") as wf:
+                wf.setnchannels(1)
+                wf.setsampwidth(SAMPLE_WIDTH)
+                wf.setframerate(SAMPLE_RATE)
+                wf.writeframes(bytes(channel.buffer))
+        else:
+            soundfile.write(path, np.frombuffer(channel.buffer, dtype=np.int16), SAMPLE_RATE,
+                            format=sf_format, subtype=subtype)
+
+        entry = {
+            "channel": channel.name,
+            "file": file_name,
+            "start": channel.segments[0][0].isoformat(),
+            "end": (channel.segments[-1][0] + timedelta(seconds=channel.segments[-1][2] / SAMPLE_RATE)).isoformat(),
+            "segments": [[start.isoformat(), offset, count] for start, offset, count in channel.segments]
+        }
+        with self.index_lock:
+            with open(self.index_path, "a") as f:
+                f.write(json.dumps(entry) + "\n")
+
+        channel.buffer = bytearray()
+        channel.segments = []
+        channel.chunk_index += 1
+
+    def close(self):
+        """Writes out the partial chunks and waits for the writer thread"""
+        self.pending.put(None)
+        self.writer.join()
+
+    def read(self, channel, start, end):
+        """
+        Returns ``(start_time, pcm_bytes)`` for every archived phrase of ``channel`` overlapping ``start``..``end``,
+        clipped to the range. Only chunks that have been flushed to disk are searched.
+        """
+        results = []
+        for entry in load_index(self.index_path):
+            if entry["channel"] != channel:
+                continue
+            if datetime.fromisoformat(entry["end"]) <= start or datetime.fromisoformat(entry["start"]) >= end:
+                continue
+            path = os.path.join(self.directory, entry["file"])
+            for segment_start, offset, count in entry["segments"]:
+                segment_start = datetime.fromisoformat(segment_start)
+                skip = max(0, int((start - segment_start).total_seconds() * SAMPLE_RATE))
+                stop = min(count, int((end - segment_start).total_seconds() * SAMPLE_RATE))
+                if stop > skip:
+                    audio = read_samples(path, offset + skip, stop - skip)
+                    results.append((segment_start + timedelta(seconds=skip / SAMPLE_RATE), audio))
+        return sorted(results, key=lambda result: result[0])
+
+    def get_stats(self):
+        return {
+            "directory": self.directory,
+            "format": self.format,
+            "archived_seconds": round(self.archived_seconds, 2),
+            "pending": self.pending.qsize()
+        }
+
+def load_index(index_path):
+    try:
+        with open(index_path) as f:
+            return [json.loads(line) for line in f if line.strip()]
+    except OSError:
+        return []
+
+def read_samples(path, offset, count):
+    """Decodes ``count`` samples starting at sample ``offset`` of an archive chunk as 16-bit PCM"""
+    if path.endswith(".wav"):
+        with wave.open(path, "rb") as wf:
+            wf.setpos(offset)
+            return wf.readframes(count)
+    with soundfile.SoundFile(path) as sf:
+        sf.seek(offset)
+        return sf.read(count, dtype="int16").tobytes()
@@ -0,0 +1,100 @@
+import re
+from AudioFormat import SAMPLE_RATE
+
+PROMPT_CHARS = 200  # characters of committed text passed back to Whisper as context
+MAX_UNCOMMITTED_SECONDS = 15  # force a commit if no two decodes agree for this long
+
+def normalize_word(word):
+    return re.sub(r"[^\w']", "", word.lower())
+
+class HypothesisBuffer:
+    """Commits the longest word prefix that two consecutive decodes agree on (LocalAgreement-2)"""
+
+    def __init__(self):
+        self.committed = []  # (start, end, word) tuples in seconds from the start of the phrase
+        self.previous = []
+        self.new = []
+        self.last_committed_time = 0.0
+
+    def insert(self, words, offset):
+        words = [(start + offset, end + offset, word) for start, end, word in words]
+        self.new = [w for w in words if w[0] > self.last_committed_time - 0.1]
+
+        # Whisper often repeats the last committed words at the start of the tail; drop that overlap
+        if self.new and self.committed and abs(self.new[0][0] - self.last_committed_time) < 1:
+            for n in range(min(len(self.committed), len(self.new), 5), 0, -1):
+                committed_tail = [normalize_word(w[2]) for w in self.committed[-n:]]
+                new_head = [normalize_word(w[2]) for w in self.new[:n]]
+                if committed_tail == new_head:
+                    del self.new[:n]
+                    break
+
+    def flush(self):
+        commit = []
+        while self.new and self.previous:
+            if normalize_word(self.new[0][2]) != normalize_word(self.previous[0][2]):
+                break
+            commit.append(self.new.pop(0))
+            self.previous.pop(0)
+            self.last_committed_time = commit[-1][1]
+        self.previous = self.new
+        self.new = []
+        self.committed.extend(commit)
+        return commit
+
+    def commit_all(self):
+        commit = self.previous
+        if commit:
+            self.last_committed_time = commit[-1][1]
+        self.committed.extend(commit)
+        self.previous = []
+        return commit
+
+    def tentative(self):
+        return self.previous
+
+class StreamingDecoder:
+    """Incrementally transcribes a growing phrase by re-decoding only the audio after the committed prefix"""
+
+    def __init__(self, model, segment_filter=None):
+        self.model = model
+        self.segment_filter = segment_filter  # drops hallucinated segments before their words can be committed
+        self.reset()
+
+    def reset(self):
+        self.hypothesis = HypothesisBuffer()
+        self.audio_offset = 0.0  # seconds of phrase audio covered by committed words
+
+    @property
+    def offset_samples(self):
+        return int(self.audio_offset * SAMPLE_RATE)
+
+    def process(self, tail_audio, model=None):
+        """Decodes the uncommitted tail of the phrase and returns (committed_text, tentative_text)"""
+        prompt = self.committed_text()[-PROMPT_CHARS:] or None
+        words = self.decode_words(tail_audio, prompt, model or self.model)
+        self.hypothesis.insert(words, self.audio_offset)
+        self.hypothesis.flush()
+
+        tail_seconds = len(tail_audio) / SAMPLE_RATE
+        if self.hypothesis.last_committed_time - self.audio_offset <= 0 and tail_seconds > MAX_UNCOMMITTED_SECONDS:
+            self.hypothesis.commit_all()
+
+        if self.hypothesis.last_committed_time > self.audio_offset:
+            self.audio_offset = self.hypothesis.last_committed_time
+
+        return self.committed_text(), self.tentative_text()
+
+    def decode_words(self, audio, prompt, model):
+        if not hasattr(model, "transcribe_segments"):
+            return model.transcribe_words(audio, prompt=prompt)
+        segments = model.transcribe_segments(audio, word_timestamps=True, prompt=prompt)
+        if self.segment_filter:
+            segments = self.segment_filter.filter(segments)
+        return [word for segment in segments for word in segment.words or []]
+
+    def committed_text(self):
+        return "".join(w[2] for w in self.hypothesis.committed).strip()
+
+    def tentative_text(self):
+        return "".join(w[2] for w in self.hypothesis.tentative()).strip()
@@ -1,52 +1,314 @@
-from openai import OpenAI
+import io
+import json
 import os
-import torch
-from faster_whisper import WhisperModel
-from openai import OpenAI
+import platform
+import threading
+import time
+import wave
+from collections import deque
+import numpy as np
+from AudioFormat import SAMPLE_RATE
+from ModelRegistry import registry
+from TranscriptionCache import TranscriptionCache
+from HybridTranscriber import HybridTranscriber
+from InferenceWorkers import pools
+from TranscriptSegments import Segment
+from OpenAIClient import get_api_key
 
-# Initialize OpenAI client with API key from environment variable or keys.py
 try:
-    from keys import OPENAI_API_KEY
-    client = OpenAI(api_key=OPENAI_API_KEY)
+    import soundfile  # in-memory FLAC/Opus encoding for API uploads
 except ImportError:
-    # Fallback to environment variable
-    client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
+    soundfile = None
 
-def get_model(use_api):
+PROFILE_PATH = os.path.join(os.path.expanduser("~"), ".ecoute", "transcriber_profile.json")
+DEFAULT_CONFIG = {"model_size": "tiny.en", "compute_type": None, "beam_size": 5, "cpu_threads": None, "num_workers": 1}
+
+API_BASE_URL = "https://api.openai.com/v1"  # OPENAI_BASE_URL overrides it, e.g. to point at a local stub
+API_MAX_CONCURRENCY = 4  # uploads in flight across every API transcriber in this process
+API_DEADLINE = 15.0  # seconds a transcription may take in total, including waiting for a slot and retries
+API_MAX_RETRIES = 3
+API_BACKOFF = 0.5  # seconds before the first retry, doubled on every further one
+API_RETRY_STATUSES = {408, 409, 429, 500, 502, 503, 504}
+API_LATENCY_WINDOW = 100  # requests kept for latency metrics
+UPLOAD_FORMATS = {
+    # name: (file name, content type, soundfile format, soundfile subtype)
+    "flac": ("audio.flac", "audio/flac", "FLAC", "PCM_16"),
+    "opus": ("audio.ogg", "audio/ogg", "OGG", "OPUS"),
+    "wav": ("audio.wav", "audio/wav", None, None),
+}
+
+http_client = None
+http_client_lock = threading.Lock()
+upload_slots = threading.BoundedSemaphore(API_MAX_CONCURRENCY)
+
+def detect_device():
+    """Returns the device faster-whisper should run on and its default compute type"""
+    try:
+        import ctranslate2  # faster-whisper's runtime; asking it avoids loading torch just for this
+        if ctranslate2.get_cuda_device_count() > 0:
+            return "cuda", "float32"
+    except ImportError:
+        pass
+    return "cpu", "int8"
+
+def host_key(device):
+    return f"{platform.node()}|{platform.machine()}|{os.cpu_count()}|{device}"
+
+def load_profile(path=PROFILE_PATH):
+    """Returns the configuration cached by ``TranscriberTuner`` for this host, or None if it hasn't been calibrated"""
+    try:
+        with open(path) as f:
+            profile = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if profile.get("host") != host_key(detect_device()[0]):
+        return None
+    return profile.get("config")
+
+def save_profile(config, results, path=PROFILE_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump({"host": host_key(detect_device()[0]), "config": config, "results": results}, f, indent=2)
+
+def get_local_model(num_workers=1, worker_processes=None):
+    """
+    ``worker_processes`` runs the model in that many separate processes instead of in this one; 0 picks a count for
+    this host. The processes are shared with every other caller asking for the same count.
+    """
+    if worker_processes is not None:
+        return pools.acquire(processes=worker_processes)
+    return FasterWhisperTranscriber(num_workers=num_workers)
+
+def get_model(use_api, num_workers=1, hybrid=False, worker_processes=None):
+    """``hybrid`` routes every phrase to whichever of the local model and the API is expected to answer first"""
+    if hybrid:
+        return TranscriptionCache(HybridTranscriber(get_local_model(num_workers, worker_processes),
+                                                    APIWhisperTranscriber()))
     if use_api:
-        return APIWhisperTranscriber()
+        return TranscriptionCache(APIWhisperTranscriber())
     else:
-        return FasterWhisperTranscriber()
+        return TranscriptionCache(get_local_model(num_workers, worker_processes))
+
+def get_fallback_model(use_api):
+    """Fastest local model, used while the transcriber can't keep up with its queues"""
+    if use_api:
+        return None
+    return TranscriptionCache(FasterWhisperTranscriber(config={"model_size": "tiny.en", "beam_size": 1}))
+
+def to_wav_bytes(audio, sample_rate=SAMPLE_RATE):
+    """Encodes a float32 NumPy array as 16-bit PCM WAV bytes for backends that need a file upload"""
+    pcm = (np.clip(audio, -1.0, 1.0) * 32767).astype(np.int16)
+    with io.BytesIO() as wav_file:
+        with wave.open(wav_file, "wb") as wav_writer:
+            wav_writer.setnchannels(1)
+            wav_writer.setsampwidth(2)
+            wav_writer.setframerate(sample_rate)
+            wav_writer.writeframes(pcm.tobytes())
+        return wav_file.getvalue()
+
+def encode_upload(audio, upload_format, sample_rate=SAMPLE_RATE):
+    """Encodes a float32 NumPy array in memory as FLAC, Opus or WAV for an API upload"""
+    _, _, sf_format, subtype = UPLOAD_FORMATS[upload_format]
+    if sf_format is None:
+        return to_wav_bytes(audio, sample_rate)
+    with io.BytesIO() as upload:
+        soundfile.write(upload, np.clip(audio, -1.0, 1.0), sample_rate, format=sf_format, subtype=subtype)
+        return upload.getvalue()
+
+def get_http_client():
+    """One keep-alive connection pool shared by every API transcriber, so requests skip the connection setup"""
+    global http_client
+    with http_client_lock:
+        if http_client is None:
+            import httpx
+            http_client = httpx.Client(limits=httpx.Limits(max_connections=API_MAX_CONCURRENCY,
+                                                           max_keepalive_connections=API_MAX_CONCURRENCY,
+                                                           keepalive_expiry=60))
+        return http_client
 
 class FasterWhisperTranscriber:
-    def __init__(self):
-        print(f"[INFO] Loading Faster Whisper model...")
-        self.model = WhisperModel("tiny.en", device="cuda" if torch.cuda.is_available() else "cpu", 
-                                 compute_type="float32" if torch.cuda.is_available() else "int8")
-        print(f"[INFO] Faster Whisper using GPU: {torch.cuda.is_available()}")
+    def __init__(self, num_workers=1, config=None):
+        """Settings come from ``config``, else the cached calibration profile, else ``DEFAULT_CONFIG``"""
+        if config is None:
+            config = load_profile()
+            if config:
+                print(f"[INFO] Using calibrated transcription profile: {config}")
+        self.config = dict(DEFAULT_CONFIG, **(config or {}))
+        self.config["num_workers"] = max(self.config["num_workers"], num_workers)
+
+        device, default_compute_type = detect_device()
+        compute_type = self.config["compute_type"] or default_compute_type
+        # num_workers > 1 lets concurrent transcribe() calls run in parallel; split the cores between them
+        cpu_threads = self.config["cpu_threads"] or max(1, (os.cpu_count() or 1) // self.config["num_workers"])
+        self.beam_size = self.config["beam_size"]
 
-    def get_transcription(self, wav_file_path):
+        # the weights are shared with every other transcriber using the same model in this process
+        self.model = registry.acquire(self.config["model_size"], device, compute_type,
+                                      cpu_threads=cpu_threads, num_workers=self.config["num_workers"])
+        print(f"[INFO] Faster Whisper using GPU: {device == 'cuda'}")
+
+    def close(self):
+        """Releases this transcriber's handle on the shared model"""
+        self.model.release()
+
+    def get_transcription(self, audio):
+        """Transcribes a mono 16 kHz float32 NumPy array without touching the disk"""
         try:
-            segments, _ = self.model.transcribe(wav_file_path, beam_size=5)
-            full_text = " ".join(segment.text for segment in segments)
-            return full_text.strip()
+            return self.decode(audio)
         except Exception as e:
             print(e)
             return ''
 
-class APIWhisperTranscriber:
-    def __init__(self, api_key=None):
-        self.client = OpenAI(api_key=api_key)
-    
-    def get_transcription(self, wav_file_path):
+    def decode(self, audio):
+        """Same as ``get_transcription`` but raises on failure, so callers can tell errors from silence"""
+        segments, _ = self.model.transcribe(audio, beam_size=self.beam_size)
+        return " ".join(segment.text for segment in segments).strip()
+
+    def transcribe_segments(self, audio, word_timestamps=False, prompt=None):
+        """Decodes into ``Segment``s with their confidence scores, optionally conditioned on ``prompt``; raises on failure"""
+        segments, _ = self.model.transcribe(audio, beam_size=self.beam_size, word_timestamps=word_timestamps,
+                                            initial_prompt=prompt, condition_on_previous_text=False)
+        return [Segment(segment.start, segment.end, segment.text, segment.avg_logprob, segment.no_speech_prob,
+                        segment.compression_ratio,
+                        [(word.start, word.end, word.word) for word in segment.words or []] if word_timestamps else None)
+                for segment in segments]
+
+    def transcribe_words(self, audio, prompt=None):
+        """Returns (start, end, word) tuples for streaming decodes, conditioned on already committed text"""
         try:
-            with open(wav_file_path, "rb") as audio_file:
-                result = self.client.audio.transcriptions.create(
-                    model="whisper-1",
-                    file=audio_file,
-                    response_format="text"  # Explicitly request text format
-                )
-            return result.text.strip()
+            return [word for segment in self.transcribe_segments(audio, True, prompt) for word in segment.words]
         except Exception as e:
             print(e)
+            return []
+
+class APIWhisperTranscriber:
+    """
+    Transcribes through an OpenAI-compatible ``/audio/transcriptions`` endpoint.
+
+    Audio is uploaded as in-memory 16 kHz mono FLAC (or Opus) over a pooled keep-alive client. At most
+    ``API_MAX_CONCURRENCY`` uploads run at once across the process; failed and throttled requests are retried with
+    exponential backoff until ``deadline`` seconds after the call started, and every attempt's timeout is whatever
+    is left of that deadline.
+    """
+
+    def __init__(self, api_key=None, base_url=None, upload_format="flac", deadline=API_DEADLINE,
+                 max_retries=API_MAX_RETRIES):
+        assert upload_format in UPLOAD_FORMATS, f"upload_format must be one of {', '.join(UPLOAD_FORMATS)}"
+        if upload_format != "wav" and soundfile is None:
+            print(f"[WARN] soundfile is not installed; uploading WAV instead of {upload_format}")
+            upload_format = "wav"
+        self.api_key = api_key or get_api_key()
+        self.base_url = (base_url or os.environ.get("OPENAI_BASE_URL") or API_BASE_URL).rstrip("/")
+        self.upload_format = upload_format
+        self.deadline = deadline
+        self.max_retries = max_retries
+        self.config = {"model": "whisper-1", "upload_format": upload_format}
+
+        self.stats_lock = threading.Lock()
+        self.latency = deque(maxlen=API_LATENCY_WINDOW)  # (seconds, bytes sent) of recent successful requests
+        self.requests = 0
+        self.failures = 0
+        self.retries = 0
+        self.bytes_sent = 0
+
+    def close(self):
+        pass  # the connection pool is shared and kept for the next transcriber
+
+    def get_transcription(self, audio):
+        """Uploads a mono 16 kHz float32 NumPy array and returns the transcript, or '' if every attempt failed"""
+        try:
+            return self.decode(audio)
+        except Exception as e:
+            print(f"[WARN] API transcription failed: {e}")
             return ''
+
+    def decode(self, audio):
+        """Same as ``get_transcription`` but raises on failure, so callers can tell errors from silence"""
+        # response_format=text returns the bare transcript
+        return self.post(audio, {"response_format": "text"}).text.strip()
+
+    def transcribe_segments(self, audio, word_timestamps=False, prompt=None):
+        """Decodes into ``Segment``s from the verbose JSON response; raises on failure"""
+        fields = {"response_format": "verbose_json"}
+        if word_timestamps:
+            fields["timestamp_granularities[]"] = ["segment", "word"]
+        if prompt:
+            fields["prompt"] = prompt
+        result = self.post(audio, fields).json()
+        # the API returns the words of the whole upload in one list; hand each segment the ones it covers
+        words = [(word["start"], word["end"], " " + word["word"]) for word in result.get("words") or []]
+        return [Segment(segment["start"], segment["end"], segment["text"], segment.get("avg_logprob", 0.0),
+                        segment.get("no_speech_prob", 0.0), segment.get("compression_ratio", 1.0),
+                        [word for word in words if segment["start"] <= word[0] < segment["end"]] if word_timestamps else None)
+                for segment in result.get("segments") or []]
+
+    def post(self, audio, fields):
+        try:
+            return self.request_transcription(encode_upload(audio, self.upload_format), fields)
+        except Exception:
+            with self.stats_lock:
+                self.failures += 1
+            raise
+
+    def request_transcription(self, upload, fields):
+        """Posts ``upload`` with the form ``fields`` and returns the successful response"""
+        import httpx
+        file_name, content_type = UPLOAD_FORMATS[self.upload_format][:2]
+        client = get_http_client()
+        started = time.monotonic()
+        deadline = started + self.deadline
+        sent = 0
+        attempt = 0
+        while True:
+            retry_after = None
+            if not upload_slots.acquire(timeout=max(0.0, deadline - time.monotonic())):
+                raise TimeoutError(f"no upload slot free within {self.deadline}s")
+            try:
+                with self.stats_lock:
+                    self.bytes_sent += len(upload)
+                sent += len(upload)
+                response = client.post(f"{self.base_url}/audio/transcriptions",
+                                       headers={"Authorization": f"Bearer {self.api_key}"},
+                                       data=dict(fields, model="whisper-1"),
+                                       files={"file": (file_name, upload, content_type)},
+                                       timeout=max(0.1, deadline - time.monotonic()))
+                if response.status_code not in API_RETRY_STATUSES:
+                    response.raise_for_status()  # other client errors won't improve with a retry
+                    self.record(time.monotonic() - started, sent)
+                    return response
+                error = f"HTTP {response.status_code}"
+                retry_after = response.headers.get("retry-after")
+            except httpx.TransportError as e:  # connection failures and timeouts
+                error = repr(e)
+            finally:
+                upload_slots.release()
+
+            delay = API_BACKOFF * 2 ** attempt
+            if retry_after and retry_after.isdigit():
+                delay = max(delay, float(retry_after))
+            attempt += 1
+            if attempt > self.max_retries or time.monotonic() + delay >= deadline:
+                raise RuntimeError(f"{error} after {attempt} attempts")
+            with self.stats_lock:
+                self.retries += 1
+            time.sleep(delay)
+
+    def record(self, latency, sent):
+        with self.stats_lock:
+            self.requests += 1
+            self.latency.append((latency, sent))
+
+    def get_request_stats(self):
+        with self.stats_lock:
+            latency = sorted(sample[0] for sample in self.latency)
+            uploads = [sample[1] for sample in self.latency]
+            return {
+                "upload_format": self.upload_format,
+                "requests": self.requests,
+                "failures": self.failures,
+                "retries": self.retries,
+                "bytes_sent": self.bytes_sent,
+                "mean_request_bytes": round(sum(uploads) / len(uploads)) if uploads else None,
+                "latency_mean_seconds": round(sum(latency) / len(latency), 3) if latency else None,
+                "latency_p95_seconds": round(latency[int(0.95 * (len(latency) - 1))], 3) if latency else None
+            }
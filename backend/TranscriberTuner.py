@@ -0,0 +1,144 @@
+"""
+Calibrates faster-whisper for this host.
+
+Runs a short micro-benchmark over the audio fixtures in ``fixtures/`` for every combination of model size,
+compute type, beam size, cpu_threads and num_workers, then caches the most accurate configuration whose
+real-time factor (decode seconds per audio second) meets the target. ``FasterWhisperTranscriber`` picks the
+cached profile up on later starts.
+
+Usage: python TranscriberTuner.py [--target-rtf 0.3] [--models tiny.en base.en] [--fixtures DIR]
+"""
+
+import argparse
+import itertools
+import os
+import re
+import sys
+import threading
+import time
+import wave
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from AudioFormat import SAMPLE_RATE
+from AudioTranscriber import pcm_to_float32
+from ModelRegistry import registry
+from TranscriberModels import FasterWhisperTranscriber, detect_device, save_profile, PROFILE_PATH
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+TARGET_RTF = 0.3
+MODEL_SIZES = ["tiny.en", "base.en", "small.en"]
+BEAM_SIZES = [1, 5]
+COMPUTE_TYPES = {"cpu": ["int8", "float32"], "cuda": ["float16", "int8_float16", "float32"]}
+
+def normalize_text(text):
+    return re.sub(r"[^\w\s']", "", text.lower()).split()
+
+def word_error_rate(reference, hypothesis):
+    """Word-level Levenshtein distance divided by the number of reference words"""
+    ref, hyp = normalize_text(reference), normalize_text(hypothesis)
+    if not ref:
+        return 0.0 if not hyp else 1.0
+    previous = list(range(len(hyp) + 1))
+    for i, ref_word in enumerate(ref, 1):
+        current = [i]
+        for j, hyp_word in enumerate(hyp, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ref_word != hyp_word)))
+        previous = current
+    return previous[-1] / len(ref)
+
+def load_fixtures(directory=FIXTURES_DIR):
+    """Returns (name, audio, reference_text) for every WAV file in ``directory`` with a matching .txt transcript"""
+    fixtures = []
+    for file_name in sorted(os.listdir(directory)):
+        if not file_name.endswith(".wav"):
+            continue
+        base = os.path.join(directory, file_name[:-4])
+        if not os.path.exists(base + ".txt"):
+            continue
+        with wave.open(base + ".wav", "rb") as wf:
+            audio = pcm_to_float32(wf.readframes(wf.getnframes()), wf.getframerate(), wf.getsampwidth(), wf.getnchannels())
+        with open(base + ".txt") as f:
+            fixtures.append((file_name, audio, f.read().strip()))
+    return fixtures
+
+def candidate_configs(model_sizes, device):
+    cores = os.cpu_count() or 1
+    thread_counts = sorted({cores, max(1, cores // 2)}, reverse=True)
+    worker_counts = [1, 2] if cores >= 4 else [1]
+    for model_size, compute_type, cpu_threads, num_workers in itertools.product(
+            model_sizes, COMPUTE_TYPES[device], thread_counts, worker_counts):
+        if num_workers * cpu_threads > cores:
+            continue
+        yield {"model_size": model_size, "compute_type": compute_type, "cpu_threads": cpu_threads, "num_workers": num_workers}
+
+def benchmark(transcriber, fixtures, beam_size):
+    """Decodes every fixture on ``num_workers`` threads at once and returns the real-time factor and mean WER"""
+    transcriber.beam_size = beam_size
+    transcriber.get_transcription(fixtures[0][1])  # warm up
+    num_workers = transcriber.config["num_workers"]
+    errors = []
+
+    def run():
+        for _, audio, reference in fixtures:
+            errors.append(word_error_rate(reference, transcriber.get_transcription(audio)))
+
+    threads = [threading.Thread(target=run) for _ in range(num_workers)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    audio_seconds = sum(len(audio) for _, audio, _ in fixtures) / SAMPLE_RATE * num_workers
+    return {"rtf": round(elapsed / audio_seconds, 4), "wer": round(sum(errors) / len(errors), 4)}
+
+def calibrate(target_rtf=TARGET_RTF, model_sizes=MODEL_SIZES, fixtures_dir=FIXTURES_DIR, profile_path=PROFILE_PATH):
+    fixtures = load_fixtures(fixtures_dir)
+    if not fixtures:
+        raise ValueError(f"no .wav/.txt fixture pairs found in {fixtures_dir}")
+
+    device, _ = detect_device()
+    results = []
+    for config in candidate_configs(model_sizes, device):
+        try:
+            transcriber = FasterWhisperTranscriber(config=dict(config, beam_size=BEAM_SIZES[0]))
+        except Exception as e:
+            print(f"[WARN] Skipping {config}: {e}")
+            continue
+        for beam_size in BEAM_SIZES:
+            result = dict(config, beam_size=beam_size, **benchmark(transcriber, fixtures, beam_size))
+            print(f"[INFO] {result}")
+            results.append(result)
+        # the registry keys models by (size, device, compute_type, cpu_threads, num_workers), so no later candidate
+        # reuses this one; unload it so only one model is in memory at a time
+        transcriber.close()
+        registry.unload_unused()
+
+    if not results:
+        raise RuntimeError("no configuration could be loaded")
+
+    # most accurate configuration that keeps up; if none does, the fastest one
+    passing = [r for r in results if r["rtf"] <= target_rtf]
+    best = min(passing, key=lambda r: (r["wer"], r["rtf"])) if passing else min(results, key=lambda r: r["rtf"])
+    config = {key: best[key] for key in ("model_size", "compute_type", "beam_size", "cpu_threads", "num_workers")}
+    save_profile(config, results, profile_path)
+    return config, best
+
+def main():
+    parser = argparse.ArgumentParser(description="Pick the most accurate faster-whisper settings that meet a real-time target")
+    parser.add_argument("--target-rtf", type=float, default=TARGET_RTF, help="maximum decode seconds per second of audio")
+    parser.add_argument("--models", nargs="+", default=MODEL_SIZES, help="model sizes to try")
+    parser.add_argument("--fixtures", default=FIXTURES_DIR, help="directory of .wav files with .txt reference transcripts")
+    parser.add_argument("--profile", default=PROFILE_PATH, help="where to cache the chosen profile")
+    args = parser.parse_args()
+
+    config, best = calibrate(args.target_rtf, args.models, args.fixtures, args.profile)
+    if best["rtf"] > args.target_rtf:
+        print(f"[WARN] No configuration met RTF {args.target_rtf}; using the fastest one")
+    print(f"[INFO] Selected {config} (RTF {best['rtf']}, WER {best['wer']})")
+    print(f"[INFO] Profile saved to {args.profile}")
+
+if __name__ == "__main__":
+    main()
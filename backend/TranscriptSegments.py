@@ -0,0 +1,65 @@
+import re
+
+NO_SPEECH_THRESHOLD = 0.6  # faster-whisper skips a window as silent above this, but only if it also decoded poorly
+LOGPROB_THRESHOLD = -1.0  # mean token log probability below which Whisper itself retries a decode
+COMPRESSION_RATIO_THRESHOLD = 2.4  # text that compresses this well is a repetition loop
+HALLUCINATED_TEXTS = {"you", "thanks for watching", "thank you for watching", "please subscribe"}
+
+def normalize_text(text):
+    return " ".join(re.sub(r"[^\w\s']", "", text.lower()).split())
+
+class Segment:
+    """One decoded segment; times are seconds from the start of the decoded audio"""
+    __slots__ = ("start", "end", "text", "avg_logprob", "no_speech_prob", "compression_ratio", "words")
+
+    def __init__(self, start, end, text, avg_logprob=0.0, no_speech_prob=0.0, compression_ratio=1.0, words=None):
+        self.start = start
+        self.end = end
+        self.text = text
+        self.avg_logprob = avg_logprob
+        self.no_speech_prob = no_speech_prob
+        self.compression_ratio = compression_ratio
+        self.words = words  # (start, end, word) tuples when word timestamps were requested
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+class SegmentFilter:
+    """Drops segments Whisper most likely hallucinated, so they never reach the transcript or the responder"""
+
+    def __init__(self, no_speech_threshold=NO_SPEECH_THRESHOLD, logprob_threshold=LOGPROB_THRESHOLD,
+                 compression_ratio_threshold=COMPRESSION_RATIO_THRESHOLD):
+        self.no_speech_threshold = no_speech_threshold
+        self.logprob_threshold = logprob_threshold
+        self.compression_ratio_threshold = compression_ratio_threshold
+        self.kept = 0
+        self.dropped = {"no_speech": 0, "low_confidence": 0, "repetition": 0, "hallucination": 0}
+
+    def rejection_reason(self, segment):
+        # like faster-whisper, a high no-speech probability alone is not enough: confident text is kept
+        if segment.no_speech_prob > self.no_speech_threshold and segment.avg_logprob < self.logprob_threshold:
+            return "no_speech"
+        if segment.avg_logprob < self.logprob_threshold:
+            return "low_confidence"
+        if segment.compression_ratio > self.compression_ratio_threshold:
+            return "repetition"
+        if normalize_text(segment.text) in HALLUCINATED_TEXTS:
+            return "hallucination"
+        return None
+
+    def filter(self, segments):
+        kept = []
+        for segment in segments:
+            reason = self.rejection_reason(segment)
+            if reason is None:
+                kept.append(segment)
+            else:
+                self.dropped[reason] += 1
+        self.kept += len(kept)
+        return kept
+
+    def get_stats(self):
+        return {"kept": self.kept, "dropped": dict(self.dropped)}
+
+def join_segments(segments):
+    return " ".join(segment.text.strip() for segment in segments).strip()
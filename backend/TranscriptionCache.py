@@ -0,0 +1,123 @@
+import hashlib
+import json
+import sys
+import threading
+from collections import OrderedDict
+import numpy as np
+
+MAX_CACHE_BYTES = 8 * 2**20  # results are small, so this holds thousands of decodes
+
+def audio_digest(audio):
+    """Fast 128-bit hash of the samples, computed on the array's memory without copying it"""
+    return hashlib.blake2b(memoryview(np.ascontiguousarray(audio)), digest_size=16).digest()
+
+def result_size(key, result):
+    """Approximate memory held by one cache entry"""
+    size = sys.getsizeof(key) + sum(sys.getsizeof(part) for part in key)
+    if isinstance(result, str):
+        return size + sys.getsizeof(result)
+    size += sys.getsizeof(result)
+    for item in result:
+        if isinstance(item, tuple):  # (start, end, word)
+            size += sys.getsizeof(item) + sys.getsizeof(item[2]) + 48
+        else:  # Segment
+            size += sys.getsizeof(item) + sys.getsizeof(item.text) + 96 + result_size((), item.words or [])
+    return size
+
+class TranscriptionCache:
+    """
+    Wraps a transcriber so an audio window it has already decoded is never decoded again.
+
+    Results are kept in an LRU keyed by a blake2b hash of the samples, the prompt and the transcriber's settings,
+    and the least recently used ones are evicted once the cache holds more than ``max_bytes``. Everything else is
+    passed through to the wrapped transcriber.
+    """
+
+    def __init__(self, model, max_bytes=MAX_CACHE_BYTES):
+        self.model = model
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.cached_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # only offer streaming decodes when the wrapped backend can do them, AudioTranscriber checks with hasattr
+        if hasattr(model, "transcribe_words"):
+            self.transcribe_words = self.cached_transcribe_words
+        if hasattr(model, "transcribe_segments"):
+            self.transcribe_segments = self.cached_transcribe_segments
+
+    def __getattr__(self, name):
+        if name == "model":
+            raise AttributeError(name)
+        return getattr(self.model, name)
+
+    def config_key(self):
+        # read on every call: the tuner changes beam_size on a live transcriber
+        config = getattr(self.model, "config", {})
+        return json.dumps([type(self.model).__name__, config, getattr(self.model, "beam_size", None)], sort_keys=True)
+
+    def get_transcription(self, audio):
+        if not hasattr(self.model, "decode"):
+            return self.cached("text", audio, None, lambda: self.model.get_transcription(audio), store_empty=False)
+        # decode raises where get_transcription would return '', so a failed request is never cached
+        try:
+            return self.cached("text", audio, None, lambda: self.model.decode(audio))
+        except Exception as e:
+            print(e)
+            return ''
+
+    def cached_transcribe_words(self, audio, prompt=None):
+        return self.cached("words", audio, prompt, lambda: self.model.transcribe_words(audio, prompt=prompt),
+                           store_empty=False)
+
+    def cached_transcribe_segments(self, audio, word_timestamps=False, prompt=None):
+        return self.cached("segments+words" if word_timestamps else "segments", audio, prompt,
+                           lambda: self.model.transcribe_segments(audio, word_timestamps, prompt))
+
+    def cached(self, kind, audio, prompt, decode, store_empty=True):
+        key = (kind, audio_digest(audio), prompt or "", self.config_key())
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return self.entries[key][0]
+            self.misses += 1
+
+        # silent windows decode to empty results; those are cached too, they're the most common repeat
+        result = decode()
+        if not result and not store_empty:
+            return result  # from a method that returns empty results on errors too; a failure must not be replayed
+        size = result_size(key, result)
+        with self.lock:
+            if key not in self.entries:
+                self.entries[key] = (result, size)
+                self.cached_bytes += size
+                while self.cached_bytes > self.max_bytes and self.entries:
+                    _, (_, evicted_size) = self.entries.popitem(last=False)
+                    self.cached_bytes -= evicted_size
+                    self.evictions += 1
+        return result
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.cached_bytes = 0
+
+    def close(self):
+        self.clear()
+        self.model.close()
+
+    def get_stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self.entries),
+                "cached_bytes": self.cached_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "evictions": self.evictions
+            }
@@ -0,0 +1,221 @@
+import queue
+import threading
+import time
+from datetime import timedelta
+from AudioFormat import BYTES_PER_SECOND, SAMPLE_WIDTH
+
+POLL_INTERVAL = 0.1  # only used for plain queue.Queue instances that can't wake the scheduler
+MAX_QUEUED_SECONDS = 30
+COALESCE_WINDOW = 3.0  # below AudioTranscriber.PHRASE_TIMEOUT, so merged chunks always belong to the same phrase
+OVERLOAD_POLICIES = ("drop_oldest", "merge", "degrade")
+
+class AudioQueue(queue.Queue):
+    """
+    A bounded ``queue.Queue`` of ``(pcm_bytes, time_spoken)`` chunks that wakes every attached scheduler as soon as
+    audio is put on it.
+
+    A chunk that arrives within ``coalesce_window`` seconds of the queued tail is appended to it instead of queued
+    separately; the merged item carries the first chunk's time as a third element so phrase detection is unchanged.
+    Once more than ``max_seconds`` of audio is waiting, ``policy`` decides what happens:
+
+    - ``drop_oldest`` drops the oldest chunks until the queue fits again
+    - ``merge`` collapses everything queued into one chunk, keeping only the most recent ``max_seconds``
+    - ``degrade`` drops like ``drop_oldest`` and flags the queue as overloaded so the transcriber switches to its
+      faster fallback model until the backlog has halved
+
+    Producers never block: ``put`` always succeeds.
+    """
+
+    def __init__(self, max_seconds=MAX_QUEUED_SECONDS, policy="drop_oldest", bytes_per_second=BYTES_PER_SECOND,
+                 coalesce_window=COALESCE_WINDOW):
+        assert policy in OVERLOAD_POLICIES, f"policy must be one of {OVERLOAD_POLICIES}"
+        super().__init__()
+        self.wake_events = []
+        self.max_bytes = int(max_seconds * bytes_per_second) // SAMPLE_WIDTH * SAMPLE_WIDTH  # whole samples
+        self.policy = policy
+        self.bytes_per_second = bytes_per_second
+        self.coalesce_window = timedelta(seconds=coalesce_window)
+        self.queued_bytes = 0
+        self.overloaded = False
+        self.merges = 0
+        self.drops = 0
+        self.dropped_bytes = 0
+
+    def attach(self, event):
+        with self.mutex:
+            self.wake_events.append(event)
+
+    def detach(self, event):
+        with self.mutex:
+            if event in self.wake_events:
+                self.wake_events.remove(event)
+
+    def _put(self, item):
+        data, time_spoken = item[0], item[1]
+        if self.queue and time_spoken - self.queue[-1][1] <= self.coalesce_window:
+            tail = self.queue.pop()
+            first_spoken = tail[2] if len(tail) > 2 else tail[1]
+            item = (tail[0] + data, time_spoken, first_spoken)
+            self.merges += 1
+        super()._put(item)
+        self.queued_bytes += len(data)
+
+        if self.queued_bytes > self.max_bytes:
+            self._shed_load()
+        for event in self.wake_events:
+            event.set()
+
+    def _shed_load(self):
+        if self.policy == "merge":
+            data = b"".join(chunk[0] for chunk in self.queue)
+            first, last = self.queue[0], self.queue[-1]
+            first_spoken = self.kept_start(first[2] if len(first) > 2 else first[1], last[1], self.max_bytes)
+            self.drop(len(data) - self.max_bytes)
+            self.queue.clear()
+            self.queue.append((data[-self.max_bytes:], last[1], first_spoken))
+            self.queued_bytes = min(len(data), self.max_bytes)
+            return
+
+        if self.policy == "degrade":
+            self.overloaded = True
+        while self.queued_bytes > self.max_bytes:
+            excess = self.queued_bytes - self.max_bytes
+            oldest = self.queue[0]
+            if len(oldest[0]) <= excess:
+                self.queue.popleft()
+                excess = len(oldest[0])
+            else:
+                # coalesced chunks can exceed the limit on their own; trim the head instead of losing all of it
+                data = oldest[0][excess:]
+                first_spoken = self.kept_start(oldest[2] if len(oldest) > 2 else oldest[1], oldest[1], len(data))
+                self.queue[0] = (data, oldest[1], first_spoken)
+            self.queued_bytes -= excess
+            self.drop(excess)
+
+    def kept_start(self, first_spoken, time_spoken, kept_bytes):
+        """Where a chunk ending at ``time_spoken`` starts once only its last ``kept_bytes`` are left, if that's later"""
+        return max(first_spoken, time_spoken - timedelta(seconds=kept_bytes / self.bytes_per_second))
+
+    def drop(self, byte_count):
+        self.drops += 1
+        self.dropped_bytes += byte_count
+
+    def _get(self):
+        self.update_overloaded()
+        item = super()._get()
+        self.queued_bytes -= len(item[0])
+        return item
+
+    def drain(self):
+        """Removes and returns every queued chunk at once"""
+        with self.mutex:
+            self.update_overloaded()
+            items = list(self.queue)
+            self.queue.clear()
+            self.queued_bytes = 0
+            return items
+
+    def update_overloaded(self):
+        # judged on the backlog found when the consumer comes back for more, not on what is left after taking it
+        if self.overloaded and self.queued_bytes <= self.max_bytes // 2:
+            self.overloaded = False
+
+    def clear(self):
+        with self.mutex:
+            self.queue.clear()
+            self.queued_bytes = 0
+            self.overloaded = False
+
+    def get_metrics(self):
+        with self.mutex:
+            return {
+                "policy": self.policy,
+                "depth": len(self.queue),
+                "queued_seconds": round(self.queued_bytes / self.bytes_per_second, 2),
+                "max_seconds": round(self.max_bytes / self.bytes_per_second, 2),
+                "merges": self.merges,
+                "drops": self.drops,
+                "dropped_seconds": round(self.dropped_bytes / self.bytes_per_second, 2),
+                "overloaded": self.overloaded
+            }
+
+class TranscriptionScheduler:
+    """Blocks until any of the given audio queues has data, and tracks how long the transcriber idles"""
+
+    def __init__(self, queues):
+        self.queues = queues
+        self.audio_ready = threading.Event()
+        self.poll_interval = None
+        for audio_queue in queues.values():
+            if hasattr(audio_queue, "attach"):
+                audio_queue.attach(self.audio_ready)
+            else:
+                self.poll_interval = POLL_INTERVAL
+
+        self.idle_time = 0.0
+        self.busy_time = 0.0
+        self.wakeups = 0
+        self.busy_since = None
+        self.drained_seconds = 0.0  # audio taken off the queues by the last wait, which the caller is decoding now
+        # whether each queue was still overloaded when it was last drained
+        self.overloaded = {name: False for name in queues}
+
+    def wait(self, timeout=None):
+        """Waits for audio and returns a dict mapping each queue name to the items drained from it"""
+        idle_since = time.perf_counter()
+        if self.busy_since is not None:
+            self.busy_time += idle_since - self.busy_since
+
+        if self.poll_interval is not None:
+            timeout = self.poll_interval if timeout is None else min(timeout, self.poll_interval)
+        # audio queued before this scheduler attached never set the event, so only block when there's nothing to drain
+        if not any(audio_queue.qsize() for audio_queue in self.queues.values()):
+            self.audio_ready.wait(timeout)
+        self.audio_ready.clear()
+
+        self.busy_since = time.perf_counter()
+        self.idle_time += self.busy_since - idle_since
+        self.wakeups += 1
+
+        drained = {}
+        for name, audio_queue in self.queues.items():
+            if hasattr(audio_queue, "drain"):
+                drained[name] = audio_queue.drain()
+                self.overloaded[name] = audio_queue.overloaded
+                continue
+            items = []
+            while True:
+                try:
+                    items.append(audio_queue.get_nowait())
+                except queue.Empty:
+                    break
+            drained[name] = items
+        self.drained_seconds = sum(len(item[0]) for items in drained.values() for item in items) / BYTES_PER_SECOND
+        return drained
+
+    def backlog_seconds(self):
+        """Audio the caller still has to decode: what the last wait drained plus what has been queued since"""
+        queued = sum(audio_queue.get_metrics()["queued_seconds"] for audio_queue in self.queues.values()
+                     if hasattr(audio_queue, "get_metrics"))
+        return self.drained_seconds + queued
+
+    def get_metrics(self):
+        total = self.idle_time + self.busy_time
+        return {
+            "idle_seconds": round(self.idle_time, 3),
+            "busy_seconds": round(self.busy_time, 3),
+            "utilization": round(self.busy_time / total, 3) if total else 0.0,
+            "wakeups": self.wakeups,
+            "drained_seconds": round(self.drained_seconds, 2),
+            "queues": {name: audio_queue.get_metrics() for name, audio_queue in self.queues.items()
+                       if hasattr(audio_queue, "get_metrics")}
+        }
+
+    def wake(self):
+        """Makes a pending ``wait`` return right away, e.g. so the caller can notice it was asked to stop"""
+        self.audio_ready.set()
+
+    def close(self):
+        for audio_queue in self.queues.values():
+            if hasattr(audio_queue, "detach"):
+                audio_queue.detach(self.audio_ready)
@@ -3,30 +3,48 @@ Enhanced FastAPI backend server for Ecoute Electron app
 Supports multiple sessions, integrations, and advanced features
 """
 
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException
+import os
+import sys
+import time
+
+STARTED = time.perf_counter()
+
+# Add backend directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from ImportProfiler import ImportProfiler
+import_profile = ImportProfiler().start()
+
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException, Response
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 import uvicorn
 import asyncio
 import threading
-import queue
-import sys
-import os
+import multiprocessing
 import json
 import uuid
-from datetime import datetime
+import io
+import wave
+from datetime import datetime, timezone
 from typing import Optional, List, Dict, Any
 from enum import Enum
 
-# Add backend directory to path
-sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
-
-from AudioTranscriber import AudioTranscriber
+from AudioTranscriber import AudioTranscriber, default_decode_workers
+from TranscriptionScheduler import AudioQueue, OVERLOAD_POLICIES
 from GPTResponder import GPTResponder
 from SearchEngine import SearchEngine
 from ActionTracker import ActionTracker
 import AudioRecorder
 import TranscriberModels
+from ModelRegistry import registry
+from InferenceWorkers import pools as worker_pools
+from CaptureHub import CaptureHub
+from SessionArchive import SessionArchive, FORMATS as ARCHIVE_FORMATS
+from AudioFormat import SAMPLE_RATE, SAMPLE_WIDTH
+import ResourceMonitor
+
+import_profile.stop()
 
 app = FastAPI(title="Ecoute API", version="3.0.0")
 
@@ -63,6 +81,30 @@ class Session:
         self.mic_queue = None
         self.is_running = False
         self.metadata = {}
+        self.threads = []
+        self.baseline = None  # ResourceMonitor snapshot taken before the pipeline started
+        self.archive = None  # SessionArchive of the raw audio, if requested on start
+
+    def stop(self, timeout=10):
+        """Stops capture, transcription and the responder, waits for their threads and releases the models"""
+        mic_hub.unsubscribe(self.mic_queue, wait=True)
+        speaker_hub.unsubscribe(self.speaker_queue, wait=True)
+        if self.archive:
+            mic_hub.unsubscribe(self.archive.channel("You"), wait=True)
+            speaker_hub.unsubscribe(self.archive.channel("Speaker"), wait=True)
+            self.archive.close()  # stays readable through /sessions/{id}/audio
+        if self.transcriber:
+            self.transcriber.stop(timeout)
+        if self.responder:
+            self.responder.stop()
+        for thread in self.threads:
+            thread.join(timeout)
+        alive = [thread.name for thread in self.threads if thread.is_alive()]
+        self.threads = []
+        if self.transcriber:
+            self.transcriber.close()
+        self.is_running = False
+        return alive
 
 class SessionManager:
     def __init__(self):
@@ -99,6 +141,12 @@ class SessionManager:
 session_manager = SessionManager()
 websocket_clients = []
 
+# One hub per physical device, shared by every running session
+mic_hub = CaptureHub("Default Mic", AudioRecorder.DefaultMicRecorder)
+speaker_hub = CaptureHub("Default Speaker", AudioRecorder.DefaultSpeakerRecorder)
+
+ARCHIVE_DIR = os.path.join(os.path.expanduser("~"), ".ecoute", "archive")
+
 # Pydantic models
 class CreateSessionRequest(BaseModel):
     name: str
@@ -150,6 +198,11 @@ settings = {
     "keyboard_shortcuts": {},
 }
 
+@app.on_event("startup")
+async def report_startup():
+    import_profile.report()
+    print(f"[INFO] Ready {time.perf_counter() - STARTED:.2f}s after start; models load when a session starts")
+
 # Routes
 @app.get("/")
 async def root():
@@ -174,7 +227,8 @@ async def get_status():
         "active_session_id": session_manager.active_session_id,
         "is_running": active_session.is_running if active_session else False,
         "total_sessions": len(session_manager.sessions),
-        "settings": settings
+        "settings": settings,
+        "startup": import_profile.get_stats()
     }
 
 # Session Management
@@ -196,11 +250,16 @@ async def list_sessions():
 @app.delete("/sessions/{session_id}")
 async def delete_session(session_id: str):
     """Delete a session"""
+    session = session_manager.get_session(session_id)
+    if session and session.is_running:
+        await asyncio.get_event_loop().run_in_executor(None, session.stop)
     session_manager.delete_session(session_id)
     return {"status": "deleted"}
 
 @app.post("/sessions/{session_id}/start")
-async def start_session(session_id: str, use_api: bool = False, enable_search: bool = True):
+async def start_session(session_id: str, use_api: bool = False, enable_search: bool = True,
+                        overload_policy: str = "drop_oldest", archive: Optional[str] = None, hybrid: bool = False,
+                        worker_processes: Optional[int] = None):
     """Start a specific session"""
     session = session_manager.get_session(session_id)
     if not session:
@@ -209,46 +268,72 @@ async def start_session(session_id: str, use_api: bool = False, enable_search: b
     if session.is_running:
         return {"status": "already_running"}
 
+    if overload_policy not in OVERLOAD_POLICIES:
+        raise HTTPException(status_code=400, detail=f"overload_policy must be one of {', '.join(OVERLOAD_POLICIES)}")
+
+    if archive is not None and archive not in ARCHIVE_FORMATS:
+        raise HTTPException(status_code=400, detail=f"archive must be one of {', '.join(ARCHIVE_FORMATS)}")
+    session.archive = None  # an earlier run's archive must not be reported or served for this one
+
+    # baseline for the leak check on stop, taken while no pipeline is running
+    if not any(s.is_running for s in session_manager.sessions.values()):
+        session.baseline = await asyncio.get_event_loop().run_in_executor(None, ResourceMonitor.snapshot, 0.5)
+
     try:
-        # Initialize queues
-        session.speaker_queue = queue.Queue()
-        session.mic_queue = queue.Queue()
+        # Initialize bounded queues; overload_policy decides what happens when transcription falls behind
+        session.speaker_queue = AudioQueue(policy=overload_policy)
+        session.mic_queue = AudioQueue(policy=overload_policy)
 
-        # Initialize audio recorders
-        user_audio_recorder = AudioRecorder.DefaultMicRecorder()
-        user_audio_recorder.record_into_queue(session.mic_queue)
+        # Subscribe to the shared capture devices; only the first session opens and calibrates them
+        mic_was_open = mic_hub.is_open
+        user_audio_recorder = mic_hub.subscribe(session.mic_queue)
 
-        await asyncio.sleep(2)
+        if not mic_was_open and user_audio_recorder.calibrated_live:
+            await asyncio.sleep(2)  # give the user a moment between the two calibration prompts
 
-        speaker_audio_recorder = AudioRecorder.DefaultSpeakerRecorder()
-        speaker_audio_recorder.record_into_queue(session.speaker_queue)
+        speaker_audio_recorder = speaker_hub.subscribe(session.speaker_queue)
 
-        # Initialize model
-        model = TranscriberModels.get_model(use_api)
+        # Optionally keep the raw audio of both channels on disk, encoded off the capture threads
+        if archive is not None:
+            session.archive = SessionArchive(os.path.join(ARCHIVE_DIR, session_id), format=archive)
+            mic_hub.subscribe(session.archive.channel("You"))
+            speaker_hub.subscribe(session.archive.channel("Speaker"))
+
+        # Initialize model with one inference worker per source on hosts with enough cores
+        decode_workers = default_decode_workers()
+        model = TranscriberModels.get_model(use_api, num_workers=decode_workers, hybrid=hybrid,
+                                            worker_processes=worker_processes)
+        fallback_model = TranscriberModels.get_fallback_model(use_api) if overload_policy == "degrade" else None
 
         # Initialize transcriber
         session.transcriber = AudioTranscriber(
-            user_audio_recorder.source,
-            speaker_audio_recorder.source,
-            model
+            user_audio_recorder,
+            speaker_audio_recorder,
+            model,
+            decode_workers=decode_workers,
+            fallback_model=fallback_model
         )
 
         # Start transcription thread
         transcribe_thread = threading.Thread(
             target=session.transcriber.transcribe_audio_queue,
             args=(session.speaker_queue, session.mic_queue),
+            name=f"transcriber-{session_id[:8]}",
             daemon=True
         )
         transcribe_thread.start()
+        session.threads.append(transcribe_thread)
 
         # Initialize GPT responder
         session.responder = GPTResponder(enable_search=enable_search)
         responder_thread = threading.Thread(
             target=session.responder.respond_to_transcriber,
             args=(session.transcriber,),
+            name=f"responder-{session_id[:8]}",
             daemon=True
         )
         responder_thread.start()
+        session.threads.append(responder_thread)
 
         session.is_running = True
         session_manager.active_session_id = session_id
@@ -257,10 +342,13 @@ async def start_session(session_id: str, use_api: bool = False, enable_search: b
             "status": "started",
             "session_id": session_id,
             "use_api": use_api,
-            "search_enabled": enable_search
+            "hybrid": hybrid,
+            "search_enabled": enable_search,
+            "archive": session.archive.get_stats() if session.archive else None
         }
 
     except Exception as e:
+        await asyncio.get_event_loop().run_in_executor(None, session.stop)
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/sessions/{session_id}/stop")
@@ -270,8 +358,19 @@ async def stop_session(session_id: str):
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
 
-    session.is_running = False
-    return {"status": "stopped"}
+    if not session.is_running:
+        return {"status": "not_running"}
+
+    # joining the pipeline threads blocks, so keep it off the event loop
+    loop = asyncio.get_event_loop()
+    alive = await loop.run_in_executor(None, session.stop)
+    if alive:
+        print(f"[WARN] Session {session_id} threads still running after stop: {alive}")
+
+    result = {"status": "stopped", "threads_still_running": alive}
+    if session.baseline and not any(s.is_running for s in session_manager.sessions.values()):
+        result["resources"] = ResourceMonitor.compare(session.baseline, await loop.run_in_executor(None, ResourceMonitor.snapshot))
+    return result
 
 @app.post("/sessions/{session_id}/activate")
 async def activate_session(session_id: str):
@@ -306,6 +405,35 @@ async def get_response(session_id: str):
         "sources": [s.to_dict() for s in session.responder.sources]
     }
 
+@app.get("/sessions/{session_id}/metrics")
+async def get_metrics(session_id: str):
+    """Get transcription pipeline metrics"""
+    session = session_manager.get_session(session_id)
+    if not session or not session.transcriber:
+        raise HTTPException(status_code=400, detail="No active transcription")
+
+    return dict(session.transcriber.get_metrics(), models=registry.get_stats(), worker_pools=worker_pools.get_stats(),
+                capture=[mic_hub.get_stats(), speaker_hub.get_stats()])
+
+@app.get("/sessions/{session_id}/audio")
+async def get_audio(session_id: str, channel: str, start: datetime, end: datetime):
+    """Get the archived audio of one channel between two times as a WAV file"""
+    session = session_manager.get_session(session_id)
+    if not session or not session.archive:
+        raise HTTPException(status_code=400, detail="Session audio is not archived")
+
+    # the archive is indexed in naive UTC, like the capture timestamps
+    start, end = (t.astimezone(timezone.utc).replace(tzinfo=None) if t.tzinfo else t for t in (start, end))
+    segments = await asyncio.get_event_loop().run_in_executor(None, session.archive.read, channel, start, end)
+    with io.BytesIO() as wav_file:
+        with wave.open(wav_file, "wb") as wf:
+            wf.setnchannels(1)
+            wf.setsampwidth(SAMPLE_WIDTH)
+            wf.setframerate(SAMPLE_RATE)
+            wf.writeframes(b"".join(audio for _, audio in segments))
+        return Response(content=wav_file.getvalue(), media_type="audio/wav",
+                        headers={"X-Segment-Starts": ",".join(time.isoformat() for time, _ in segments)})
+
 @app.get("/sessions/{session_id}/insights")
 async def get_insights(session_id: str):
     """Get conversation insights"""
@@ -597,6 +725,7 @@ async def websocket_endpoint(websocket: WebSocket):
             websocket_clients.remove(websocket)
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()  # inference worker processes are spawned from this executable when frozen
     print("Starting Ecoute Enhanced API Server...")
     print("Server running on http://127.0.0.1:8000")
     print("Features: Multi-session, Export, Search, Voice Commands, Integrations")
@@ -2,7 +2,8 @@
 Minimal test API server for testing frontend components
 Implements V3.0 endpoints without audio transcription dependencies
 """
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Request
+from fastapi.responses import PlainTextResponse, JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from typing import Optional, List, Dict
@@ -233,6 +234,21 @@ def update_settings(update: SettingsUpdate):
 
     return {"status": "updated", "settings": settings}
 
+# OpenAI-compatible transcription stub; run the real backend with OPENAI_BASE_URL=http://127.0.0.1:8000/v1
+# to exercise API mode without a key
+@app.post("/v1/audio/transcriptions", response_class=PlainTextResponse)
+async def create_transcription(request: Request):
+    body = await request.body()
+    text = f"Stub transcription of a {len(body)} byte upload"
+    if b"verbose_json" in body:  # the multipart form isn't parsed; the requested format is visible in the raw body
+        return JSONResponse({
+            "text": text,
+            "segments": [{"start": 0.0, "end": 1.0, "text": text, "avg_logprob": -0.1, "no_speech_prob": 0.01,
+                          "compression_ratio": 1.0}],
+            "words": [{"start": 0.1 * i, "end": 0.1 * (i + 1), "word": word} for i, word in enumerate(text.split())]
+        })
+    return text
+
 # WebSocket
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
@@ -0,0 +1,42 @@
+"""
+Tests for how offline transcription cuts recordings into timestamped phrases.
+
+Run with: python -m pytest backend/test_batch_transcriber.py
+"""
+import os
+import sys
+import wave
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from AudioFormat import SAMPLE_RATE, SAMPLE_WIDTH
+from BatchTranscriber import split_phrases
+
+def write_recording(path, layout):
+    """Writes ``(seconds, is_tone)`` parts to a mono 16-bit WAV"""
+    parts = []
+    for seconds, is_tone in layout:
+        t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+        parts.append(np.sin(2 * np.pi * 440 * t) * 10000 if is_tone else np.zeros_like(t))
+    with wave.open(path, "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(SAMPLE_WIDTH)
+        wf.setframerate(SAMPLE_RATE)
+        wf.writeframes(np.concatenate(parts).astype(np.int16).tobytes())
+
+def test_phrase_times_match_the_speech_in_the_file(tmp_path):
+    path = str(tmp_path / "meeting.wav")
+    write_recording(path, [(1.0, False), (1.5, True), (5.0, False), (2.0, True), (3.0, False)])
+
+    duration, phrases = split_phrases(path)
+
+    assert duration == 12.5
+    assert len(phrases) == 2
+    for (start, end, _), (speech_start, speech_end) in zip(phrases, [(1.0, 2.5), (7.5, 9.5)]):
+        # trimming keeps 0.2 s of padding after the speech, not the pause listen waited for
+        assert abs(end - (speech_end + 0.2)) < 0.1
+        # the padding before it is lost when speech starts just as listen times out
+        assert speech_start - 0.3 < start < speech_start + 0.05
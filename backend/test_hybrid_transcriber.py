@@ -0,0 +1,82 @@
+"""
+Tests for routing between the local model and the API, and how failovers interact with the cache.
+
+Run with: python -m pytest backend/test_hybrid_transcriber.py
+"""
+import os
+import sys
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from AudioFormat import BYTES_PER_SECOND, SAMPLE_RATE
+from HybridTranscriber import HybridTranscriber
+from TranscriptionCache import TranscriptionCache
+from TranscriptSegments import Segment
+from TranscriptionScheduler import AudioQueue, TranscriptionScheduler
+
+class FlakyModel:
+    def __init__(self, text, failing=False):
+        self.text = text
+        self.failing = failing
+        self.decodes = 0
+
+    def decode(self, audio):
+        self.decodes += 1
+        if self.failing:
+            raise RuntimeError("unavailable")
+        return self.text
+
+    def transcribe_segments(self, audio, word_timestamps=False, prompt=None):
+        return [Segment(0.0, 1.0, self.decode(audio))]
+
+    def close(self):
+        pass
+
+def make_cached_hybrid(local_failing, api_failing):
+    local, api = FlakyModel("local", local_failing), FlakyModel("api", api_failing)
+    return TranscriptionCache(HybridTranscriber(local, api)), local, api
+
+def test_failover_result_is_cached():
+    cache, local, api = make_cached_hybrid(local_failing=True, api_failing=False)
+    audio = np.zeros(SAMPLE_RATE, dtype=np.float32)
+
+    assert cache.transcribe_segments(audio)[0].text == "api"
+    assert cache.transcribe_segments(audio)[0].text == "api"
+    assert (local.decodes, api.decodes) == (1, 1)
+    assert cache.model.failovers == 1
+
+def test_failure_on_both_backends_raises_and_is_not_cached():
+    cache, local, api = make_cached_hybrid(local_failing=True, api_failing=True)
+    audio = np.zeros(SAMPLE_RATE, dtype=np.float32)
+
+    with pytest.raises(RuntimeError):
+        cache.transcribe_segments(audio)
+    assert cache.get_transcription(audio) == ''
+    assert cache.get_stats()["entries"] == 0
+
+    # once a backend recovers the same audio is decoded again instead of served as silence
+    api.failing = False
+    cache.model.api.failed_until = 0.0
+    assert cache.transcribe_segments(audio)[0].text == "api"
+    assert cache.get_transcription(audio) == "api"
+
+def test_drained_backlog_moves_phrases_to_the_api():
+    cache, local, api = make_cached_hybrid(local_failing=False, api_failing=False)
+    audio_queue = AudioQueue(coalesce_window=0)
+    scheduler = TranscriptionScheduler({"You": audio_queue})
+    cache.attach_scheduler(scheduler)
+    phrase = np.zeros(SAMPLE_RATE, dtype=np.float32)
+
+    assert cache.get_transcription(phrase) == "local"
+    start = datetime.utcnow()
+    for i in range(20):
+        audio_queue.put((b"\0" * BYTES_PER_SECOND, start + timedelta(seconds=i)))
+    scheduler.wait()  # the queue is empty again, but those 20 seconds still have to be decoded
+    assert cache.model.backlog_seconds() == 20
+    next_phrase = np.full(SAMPLE_RATE, 0.1, dtype=np.float32)  # different audio, so it isn't served from the cache
+    assert cache.get_transcription(next_phrase) == "api"
+    scheduler.close()
@@ -0,0 +1,52 @@
+"""
+Tests for archiving captured audio and reading it back by time.
+
+Run with: python -m pytest backend/test_session_archive.py
+"""
+import os
+import sys
+import wave
+from datetime import datetime, timedelta
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from AudioFormat import BYTES_PER_SECOND, SAMPLE_RATE, SAMPLE_WIDTH
+from AudioRecorder import ReplayRecorder
+from SessionArchive import SessionArchive
+
+START = datetime(2024, 5, 1, 9, 0)
+
+def write_recording(path, layout):
+    """Writes ``(seconds, is_tone)`` parts to a mono 16-bit WAV"""
+    parts = []
+    for seconds, is_tone in layout:
+        t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+        parts.append(np.sin(2 * np.pi * 440 * t) * 10000 if is_tone else np.zeros_like(t))
+    with wave.open(path, "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(SAMPLE_WIDTH)
+        wf.setframerate(SAMPLE_RATE)
+        wf.writeframes(np.concatenate(parts).astype(np.int16).tobytes())
+
+def test_archived_phrases_start_where_they_were_spoken(tmp_path):
+    path = str(tmp_path / "meeting.wav")
+    write_recording(path, [(1.0, False), (1.5, True), (5.0, False), (2.0, True), (3.0, False)])
+    archive = SessionArchive(str(tmp_path / "archive"), format="wav")
+
+    recorder = ReplayRecorder(path, speed=None, start_time=START)
+    stop_listening = recorder.record_into_queue(archive.channel("You"))
+    recorder.finished.wait()
+    stop_listening(wait_for_stop=True)
+    archive.close()
+
+    phrases = archive.read("You", START, START + timedelta(seconds=15))
+    assert len(phrases) == 2
+    for (start_time, pcm), (speech_start, speech_end) in zip(phrases, [(1.0, 2.5), (7.5, 9.5)]):
+        start = (start_time - START).total_seconds()
+        end = start + len(pcm) / BYTES_PER_SECOND
+        # 0.2 s of padding is kept after the speech; the padding before it can be lost to a listen timeout
+        assert abs(end - (speech_end + 0.2)) < 0.1
+        assert speech_start - 0.3 < start < speech_start + 0.05
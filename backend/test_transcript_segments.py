@@ -0,0 +1,30 @@
+"""
+Tests for the filter that drops segments Whisper most likely hallucinated.
+
+Run with: python -m pytest backend/test_transcript_segments.py
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from TranscriptSegments import Segment, SegmentFilter
+
+def test_no_speech_needs_a_poor_decode_too():
+    segment_filter = SegmentFilter()
+    assert segment_filter.rejection_reason(Segment(0, 1, "Let's start.", avg_logprob=-0.3, no_speech_prob=0.7)) is None
+    assert segment_filter.rejection_reason(Segment(0, 1, "Um.", avg_logprob=-1.2, no_speech_prob=0.7)) == "no_speech"
+
+def test_rejection_reasons():
+    segment_filter = SegmentFilter()
+    assert segment_filter.rejection_reason(Segment(0, 1, "Mumble.", avg_logprob=-1.5)) == "low_confidence"
+    assert segment_filter.rejection_reason(Segment(0, 1, "go go go go", compression_ratio=3.0)) == "repetition"
+    assert segment_filter.rejection_reason(Segment(0, 1, " Thanks for watching!")) == "hallucination"
+
+def test_filter_counts_kept_and_dropped_segments():
+    segment_filter = SegmentFilter()
+    segments = [Segment(0, 1, "Hello there."), Segment(1, 2, "you"), Segment(2, 3, "Bye.", no_speech_prob=0.9)]
+    assert [segment.text for segment in segment_filter.filter(segments)] == ["Hello there.", "Bye."]
+    assert segment_filter.get_stats() == {
+        "kept": 2, "dropped": {"no_speech": 0, "low_confidence": 0, "repetition": 0, "hallucination": 1}
+    }
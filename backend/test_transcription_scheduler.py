@@ -0,0 +1,135 @@
+"""
+Tests for the audio queues, the scheduler and how the transcriber reacts to them.
+
+Run with: python -m pytest backend/test_transcription_scheduler.py
+"""
+import os
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from AudioFormat import BYTES_PER_SECOND, SAMPLE_RATE, SAMPLE_WIDTH
+from AudioTranscriber import AudioTranscriber
+from TranscriptionScheduler import AudioQueue, TranscriptionScheduler
+
+class FakeRecorder:
+    SAMPLE_RATE = SAMPLE_RATE
+    SAMPLE_WIDTH = SAMPLE_WIDTH
+    channels = 1
+
+class FakeModel:
+    def __init__(self, delay):
+        self.delay = delay
+        self.decodes = 0
+
+    def get_transcription(self, audio):
+        time.sleep(self.delay)
+        self.decodes += 1
+        return "hello"
+
+    def close(self):
+        pass
+
+def test_degrade_uses_fallback_model_under_sustained_overload():
+    mic_queue = AudioQueue(max_seconds=1, policy="degrade")
+    speaker_queue = AudioQueue(max_seconds=1, policy="degrade")
+    model, fallback_model = FakeModel(delay=0.2), FakeModel(delay=0.0)
+    transcriber = AudioTranscriber(FakeRecorder(), FakeRecorder(), model, streaming=False, decode_workers=1,
+                                   fallback_model=fallback_model)
+    thread = threading.Thread(target=transcriber.transcribe_audio_queue, args=(speaker_queue, mic_queue), daemon=True)
+    thread.start()
+
+    # a second of audio every 50 ms while the main model needs 200 ms per decode
+    start = datetime.utcnow()
+    for i in range(30):
+        mic_queue.put((b"\0" * BYTES_PER_SECOND, start + timedelta(seconds=i)))
+        time.sleep(0.05)
+    time.sleep(0.3)
+    transcriber.stop()
+    thread.join(5)
+
+    assert mic_queue.drops > 0
+    assert fallback_model.decodes > 0
+    assert transcriber.get_metrics()["degraded_decodes"]["You"] == fallback_model.decodes
+
+def test_wait_returns_audio_queued_before_the_scheduler_attached():
+    mic_queue = AudioQueue()
+    mic_queue.put((b"\0" * BYTES_PER_SECOND, datetime.utcnow()))
+    scheduler = TranscriptionScheduler({"You": mic_queue})
+
+    start = time.perf_counter()
+    drained = scheduler.wait(timeout=2)
+    assert time.perf_counter() - start < 0.5
+    assert len(drained["You"]) == 1
+    scheduler.close()
+
+def test_unchanged_text_is_not_requeued():
+    mic_queue, speaker_queue = AudioQueue(coalesce_window=0), AudioQueue()
+    transcriber = AudioTranscriber(FakeRecorder(), FakeRecorder(), FakeModel(delay=0.0), streaming=False,
+                                   decode_workers=1)
+    thread = threading.Thread(target=transcriber.transcribe_audio_queue, args=(speaker_queue, mic_queue), daemon=True)
+    thread.start()
+
+    updates = 0
+    start = datetime.utcnow()
+    for i in range(3):  # one phrase, decoded three times to the same text
+        transcriber.transcript_changed_event.clear()
+        mic_queue.put((b"\0" * BYTES_PER_SECOND, start + timedelta(seconds=i)))
+        updates += transcriber.transcript_changed_event.wait(1)
+    transcriber.stop()
+    thread.join(5)
+
+    assert updates == 1
+    assert transcriber.get_transcript() == "You: [hello]\n\n"
+
+def test_drop_oldest_moves_first_spoken_past_a_dropped_head():
+    audio_queue = AudioQueue(max_seconds=0.8, coalesce_window=3)
+    start = datetime.utcnow()
+    audio_queue.put((b"\1" * BYTES_PER_SECOND, start))
+    audio_queue.put((b"\2" * BYTES_PER_SECOND, start + timedelta(seconds=1)))
+
+    (data, time_spoken, first_spoken), = audio_queue.drain()
+    assert data == b"\2" * int(0.8 * BYTES_PER_SECOND)
+    assert time_spoken == start + timedelta(seconds=1)
+    assert first_spoken == start + timedelta(seconds=0.2)  # where the kept audio begins, not the dropped chunk
+    assert audio_queue.get_metrics()["dropped_seconds"] == 1.2
+
+def test_drop_oldest_keeps_first_spoken_while_the_first_chunk_survives():
+    audio_queue = AudioQueue(max_seconds=1.5, coalesce_window=3)
+    start = datetime.utcnow()
+    audio_queue.put((b"\1" * BYTES_PER_SECOND, start))
+    audio_queue.put((b"\2" * BYTES_PER_SECOND, start + timedelta(seconds=1)))
+
+    (data, _, first_spoken), = audio_queue.drain()
+    assert len(data) == int(1.5 * BYTES_PER_SECOND)
+    assert first_spoken == start
+
+def test_merge_collapses_the_queue_into_its_most_recent_audio():
+    audio_queue = AudioQueue(max_seconds=1.5, policy="merge", coalesce_window=0)
+    start = datetime.utcnow()
+    for i in range(3):
+        audio_queue.put((bytes([i]) * BYTES_PER_SECOND, start + timedelta(seconds=i * 5)))
+
+    (data, time_spoken, first_spoken), = audio_queue.drain()
+    assert data == b"\1" * (BYTES_PER_SECOND // 2) + b"\2" * BYTES_PER_SECOND
+    assert time_spoken == start + timedelta(seconds=10)
+    assert first_spoken == start + timedelta(seconds=8.5)
+    assert audio_queue.get_metrics()["queued_seconds"] == 0
+
+def test_degrade_stays_overloaded_until_the_backlog_has_halved():
+    audio_queue = AudioQueue(max_seconds=1, policy="degrade", coalesce_window=0)
+    scheduler = TranscriptionScheduler({"You": audio_queue})
+    start = datetime.utcnow()
+
+    overloaded = []
+    for i, seconds in enumerate([1.5, 0.8, 0.4]):
+        audio_queue.put((b"\0" * int(seconds * BYTES_PER_SECOND), start + timedelta(seconds=i * 5)))
+        scheduler.wait(timeout=1)
+        overloaded.append(scheduler.overloaded["You"])
+    scheduler.close()
+
+    assert overloaded == [True, True, False]
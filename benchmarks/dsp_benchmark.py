@@ -0,0 +1,93 @@
+"""
+Compares custom_speech_recognition.dsp with audioop on long buffers.
+
+Times every conversion the recognizer and recorders run (RMS, resampling, width conversion, bias, downmixing,
+byte swapping) over a few minutes of synthetic 48 kHz stereo audio, and checks that both backends agree. audioop
+only exists up to Python 3.12; without it just the NumPy timings are printed.
+
+Usage: python benchmarks/dsp_benchmark.py [--minutes 5] [--repeat 3]
+"""
+
+import argparse
+import os
+import sys
+import time
+import warnings
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from custom_speech_recognition import dsp
+
+try:
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", DeprecationWarning)
+        import audioop
+except ImportError:
+    audioop = None
+
+SAMPLE_RATE = 48000
+CHANNELS = 2
+
+def make_audio(minutes):
+    """Speech-like test signal: a few harmonics under a slow envelope, plus noise"""
+    rng = np.random.default_rng(0)
+    t = np.arange(int(minutes * 60 * SAMPLE_RATE)) / SAMPLE_RATE
+    envelope = 0.5 + 0.5 * np.sin(2 * np.pi * 0.5 * t)
+    signal = sum(np.sin(2 * np.pi * f * t) / (i + 1) for i, f in enumerate((180, 360, 720, 1440)))
+    mono = 8000 * envelope * signal + rng.normal(0, 300, len(t))
+    stereo = np.column_stack([mono, mono * 0.8]).reshape(-1)
+    return np.clip(stereo, -32768, 32767).astype("<i2").tobytes()
+
+def cases(stereo):
+    mono = dsp.downmix(stereo, 2, CHANNELS)
+    return [
+        ("rms", lambda m: m.rms(mono, 2)),
+        ("ratecv 48k->16k", lambda m: m.ratecv(mono, 2, 1, SAMPLE_RATE, 16000, None)[0]),
+        ("ratecv 44.1k->16k", lambda m: m.ratecv(mono, 2, 1, 44100, 16000, None)[0]),
+        ("lin2lin 16->32 bit", lambda m: m.lin2lin(mono, 2, 4)),
+        ("bias", lambda m: m.bias(mono, 2, 128)),
+        ("tomono", lambda m: m.tomono(stereo, 2, 0.5, 0.5)),
+        ("byteswap", lambda m: m.byteswap(mono, 2)),
+    ]
+
+def best_time(function, repeat):
+    result, best = None, float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def max_difference(a, b):
+    if isinstance(a, int):
+        return abs(a - b)
+    a, b = np.frombuffer(a, dtype="<i2"), np.frombuffer(b, dtype="<i2")
+    if len(a) != len(b):
+        return f"length {len(a)} vs {len(b)}"
+    return int(np.abs(a.astype(np.int64) - b).max()) if len(a) else 0
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the NumPy DSP functions against audioop")
+    parser.add_argument("--minutes", type=float, default=5, help="length of the test buffer")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per function; the fastest is reported")
+    args = parser.parse_args()
+
+    stereo = make_audio(args.minutes)
+    print(f"[INFO] {args.minutes:g} min of {SAMPLE_RATE} Hz stereo audio ({len(stereo) / 1e6:.1f} MB)")
+    if audioop is None:
+        print("[WARN] audioop is not available on this Python; showing NumPy timings only")
+
+    print(f"{'function':<20}{'numpy':>10}{'audioop':>10}{'speedup':>10}  max difference")
+    for name, run in cases(stereo):
+        numpy_time, numpy_result = best_time(lambda: run(dsp), args.repeat)
+        if audioop is None:
+            print(f"{name:<20}{numpy_time * 1000:>8.1f}ms")
+            continue
+        audioop_time, audioop_result = best_time(lambda: run(audioop), args.repeat)
+        print(f"{name:<20}{numpy_time * 1000:>8.1f}ms{audioop_time * 1000:>8.1f}ms{audioop_time / numpy_time:>9.1f}x  "
+              f"{max_difference(numpy_result, audioop_result)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Generates reference clips for the transcription benchmark and the tuner with the system's text-to-speech voices.
+
+Each fixture is a short meeting exchange: its utterances are synthesized one by one, converted to 16 kHz mono and
+joined with pauses longer than AudioTranscriber.PHRASE_TIMEOUT, so every utterance is transcribed as its own
+phrase. The .wav files are written next to .txt files holding the exact text that was spoken. The text is part of
+this repository, so the clips carry no third-party licence.
+
+Synthesis goes through pyttsx3 (SAPI5 on Windows, NSSpeechSynthesizer on macOS, eSpeak on Linux). Synthetic speech
+is cleaner than a real meeting, so treat the WER as a regression signal rather than an accuracy figure; recorded
+clips can be added to the same directory alongside these.
+
+Usage: python benchmarks/make_fixtures.py [--output backend/fixtures] [--voice NAME] [--rate 170]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import wave
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+import custom_speech_recognition as sr
+
+FIXTURES_DIR = os.path.join(REPO_DIR, "backend", "fixtures")  # where TranscriberTuner and the benchmark look
+SAMPLE_RATE = 16000
+SAMPLE_WIDTH = 2
+LEAD_SECONDS = 0.5  # silence before the first utterance
+GAP_SECONDS = 4.0  # between utterances; longer than PHRASE_TIMEOUT so each one is a separate phrase
+FIXTURES = {
+    "standup": [
+        "Good morning everyone, let's start with a quick round of updates.",
+        "I finished the login page yesterday and today I'm moving on to the settings screen.",
+        "The build on the release branch is still failing, so I could use a second pair of eyes on it.",
+    ],
+    "planning": [
+        "We have three weeks until the beta, which leaves room for about two more features.",
+        "I would rather fix the export bugs first, because customers report them every week.",
+        "Let's put search history on the list and revisit the calendar integration next quarter.",
+    ],
+    "numbers": [
+        "Revenue grew twelve percent over the last quarter.",
+        "We signed forty new customers in March, most of them in Europe.",
+        "The support queue is down to ninety tickets, from about two hundred in January.",
+    ],
+    "action_items": [
+        "Before we wrap up, let's go over the action items.",
+        "Maria will send the draft contract to the legal team by Friday.",
+        "I will schedule a follow up call with the vendor for next Tuesday afternoon.",
+        "Can someone update the roadmap document after this meeting?",
+    ],
+    "questions": [
+        "What is the expected latency if we move transcription to the cloud?",
+        "Do we know how many users still run the old desktop version?",
+        "How long would it take to migrate the database to the new server?",
+    ],
+}
+
+def synthesize(engine, text, path):
+    engine.save_to_file(text, path)
+    engine.runAndWait()
+    # eSpeak and SAPI write WAV, macOS writes AIFF; AudioFile reads either
+    with sr.AudioFile(path) as source:
+        audio = sr.AudioData(source.stream.read(), source.SAMPLE_RATE, source.SAMPLE_WIDTH)
+    return audio.get_raw_data(convert_rate=SAMPLE_RATE, convert_width=SAMPLE_WIDTH)
+
+def silence(seconds):
+    return b"\0" * (int(seconds * SAMPLE_RATE) * SAMPLE_WIDTH)
+
+def main():
+    parser = argparse.ArgumentParser(description="Synthesize benchmark fixtures with text-to-speech")
+    parser.add_argument("--output", default=FIXTURES_DIR, help="directory to write the .wav/.txt pairs to")
+    parser.add_argument("--voice", help="substring of the voice name or id to use; defaults to the system voice")
+    parser.add_argument("--rate", type=int, default=170, help="speaking rate in words per minute")
+    args = parser.parse_args()
+
+    try:
+        import pyttsx3
+    except ImportError:
+        raise SystemExit("[ERROR] pyttsx3 is required to synthesize fixtures: pip install pyttsx3")
+
+    engine = pyttsx3.init()
+    engine.setProperty("rate", args.rate)
+    if args.voice:
+        voices = [v for v in engine.getProperty("voices") if args.voice.lower() in (v.name + v.id).lower()]
+        if not voices:
+            raise SystemExit(f"[ERROR] No voice matching {args.voice!r}")
+        engine.setProperty("voice", voices[0].id)
+
+    os.makedirs(args.output, exist_ok=True)
+    with tempfile.TemporaryDirectory() as scratch:
+        for name, utterances in FIXTURES.items():
+            frames = [silence(LEAD_SECONDS)]
+            for i, text in enumerate(utterances):
+                frames.append(synthesize(engine, text, os.path.join(scratch, f"{name}-{i}.wav")))
+                frames.append(silence(GAP_SECONDS))
+
+            base = os.path.join(args.output, name)
+            with wave.open(base + ".wav", "wb") as wf:
+                wf.setnchannels(1)
+                wf.setsampwidth(SAMPLE_WIDTH)
+                wf.setframerate(SAMPLE_RATE)
+                wf.writeframes(b"".join(frames))
+            with open(base + ".txt", "w") as f:
+                f.write(" ".join(utterances) + "\n")
+            seconds = sum(len(frame) for frame in frames) / (SAMPLE_RATE * SAMPLE_WIDTH)
+            print(f"[INFO] {name}.wav: {len(utterances)} utterances, {seconds:.1f}s")
+
+if __name__ == "__main__":
+    main()
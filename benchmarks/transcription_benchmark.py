@@ -0,0 +1,284 @@
+"""
+Measures transcription speed and accuracy end to end.
+
+Every fixture (a .wav recording with a matching .txt reference transcript, see backend/fixtures/README.md) is
+replayed through ReplayRecorder into a real AudioTranscriber, the same path live microphone audio takes, and the
+benchmark records:
+
+- real-time factor: seconds spent decoding per second of audio
+- first-text latency: from the first chunk of a phrase being queued to the first text of that phrase
+- final-text latency: from the last chunk of a phrase being queued to the last decode of that phrase
+- process CPU use and peak resident memory
+- word error rate of the transcript against the reference
+
+Latencies are reported as p50/p95/p99 over every phrase. They are only meaningful when replaying in real time
+(--speed 1, the default). Results are written as JSON together with the host and commit, so runs can be compared
+across commits and hosts with --compare. benchmarks/make_fixtures.py synthesizes a starter set of fixtures.
+
+Usage: python benchmarks/transcription_benchmark.py [--fixtures DIR] [--output results.json] [--compare old.json]
+                                                    [--speed 1.0] [--api] [--model tiny.en] [--no-streaming]
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+sys.path.insert(0, os.path.join(REPO_DIR, "backend"))
+
+from AudioRecorder import ReplayRecorder
+from AudioTranscriber import AudioTranscriber
+from TranscriptionScheduler import AudioQueue
+from TranscriberTuner import FIXTURES_DIR, normalize_text, word_error_rate
+import ResourceMonitor
+
+SETTLE_SECONDS = 1.0  # the transcriber must stay idle this long after the replay ends before a fixture is done
+RSS_SAMPLE_INTERVAL = 0.2
+PERCENTILES = (50, 95, 99)
+SUMMARY_METRICS = ["rtf", "wer", "first_text_p50", "first_text_p95", "final_text_p50", "final_text_p95",
+                   "cpu_percent", "peak_rss_mb"]
+
+def percentile(values, p):
+    """Nearest-rank percentile, or None without samples"""
+    if not values:
+        return None
+    values = sorted(values)
+    return round(values[min(len(values) - 1, max(0, int(round(p / 100 * len(values))) - 1))], 3)
+
+def find_fixtures(directory):
+    fixtures = []
+    for file_name in sorted(os.listdir(directory)):
+        base = os.path.join(directory, file_name[:-4])
+        if file_name.endswith(".wav") and os.path.exists(base + ".txt"):
+            with open(base + ".txt") as f:
+                fixtures.append((file_name, base + ".wav", f.read().strip()))
+    return fixtures
+
+class TimedQueue(AudioQueue):
+    """Remembers when each chunk was queued, keyed by its capture time"""
+    def __init__(self):
+        super().__init__()
+        self.put_times = {}
+
+    def put(self, item, block=True, timeout=None):
+        self.put_times[item[1]] = time.perf_counter()
+        super().put(item, block, timeout)
+
+class TimedModel:
+    """Passes decodes through to a transcriber and records how long each one took"""
+    def __init__(self, model):
+        self.model = model
+        self.decode_seconds = 0.0
+        self.in_flight = 0
+        for name in ("get_transcription", "transcribe_words", "transcribe_segments"):
+            if hasattr(model, name):
+                setattr(self, name, self.timed(getattr(model, name)))
+
+    def __getattr__(self, name):
+        if name == "model":
+            raise AttributeError(name)
+        return getattr(self.model, name)
+
+    def timed(self, method):
+        def call(audio, *args, **kwargs):
+            self.in_flight += 1
+            start = time.perf_counter()
+            try:
+                return method(audio, *args, **kwargs)
+            finally:
+                self.decode_seconds += time.perf_counter() - start
+                self.in_flight -= 1
+        return call
+
+class BenchmarkTranscriber(AudioTranscriber):
+    """Tracks when the audio of every phrase was queued and when its text appeared"""
+    def __init__(self, *args, put_times=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.put_times = put_times
+        self.phrases = []
+        self.current_phrase = {}
+
+    def update_last_sample_and_phrase_status(self, who_spoke, data, time_spoken, first_spoken=None):
+        super().update_last_sample_and_phrase_status(who_spoke, data, time_spoken, first_spoken)
+        last_queued = self.put_times[who_spoke].get(time_spoken, time.perf_counter())
+        phrase = self.current_phrase.get(who_spoke)
+        if phrase is None or self.audio_sources[who_spoke]["new_phrase"]:
+            phrase = {"who": who_spoke, "text": "", "first_text": None, "final_text": None,
+                      "first_queued": self.put_times[who_spoke].get(first_spoken or time_spoken, last_queued)}
+            self.phrases.append(phrase)
+            self.current_phrase[who_spoke] = phrase
+        phrase["last_queued"] = last_queued
+
+    def update_transcript(self, who_spoke, text, time_spoken, tentative=''):
+        super().update_transcript(who_spoke, text, time_spoken, tentative)
+        phrase = self.current_phrase.get(who_spoke)
+        text = f"{text} {tentative}".strip()
+        if phrase is None or not text:
+            return
+        now = time.perf_counter()
+        if phrase["first_text"] is None:
+            phrase["first_text"] = now
+        phrase["text"] = text
+        phrase["final_text"] = now
+
+class RssSampler:
+    def __init__(self):
+        self.peak = ResourceMonitor.rss_mb()
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def run(self):
+        while not self.stop_event.wait(RSS_SAMPLE_INTERVAL):
+            rss = ResourceMonitor.rss_mb()
+            if rss is not None:
+                self.peak = max(self.peak or 0, rss)
+
+    def stop(self):
+        self.stop_event.set()
+        self.thread.join()
+        return round(self.peak, 1) if self.peak is not None else None
+
+def run_fixture(path, reference, model, speed, streaming):
+    recorder = ReplayRecorder(path, speed=speed, start_time=datetime.utcnow())
+    mic_queue, speaker_queue = TimedQueue(), TimedQueue()
+    timed_model = TimedModel(model)
+    transcriber = BenchmarkTranscriber(recorder, recorder, timed_model, streaming=streaming, decode_workers=1,
+                                       put_times={"You": mic_queue.put_times, "Speaker": speaker_queue.put_times})
+    transcribe_thread = threading.Thread(target=transcriber.transcribe_audio_queue, args=(speaker_queue, mic_queue))
+    transcribe_thread.daemon = True
+
+    rss = RssSampler()
+    cpu_start, wall_start = time.process_time(), time.perf_counter()
+    transcribe_thread.start()
+    stop_listening = recorder.record_into_queue(mic_queue)
+    recorder.finished.wait()
+    stop_listening(wait_for_stop=True)
+
+    # wait for the transcriber to work through what is queued and go quiet
+    idle_since = None
+    while idle_since is None or time.perf_counter() - idle_since < SETTLE_SECONDS:
+        idle = mic_queue.empty() and timed_model.in_flight == 0
+        idle_since = (idle_since or time.perf_counter()) if idle else None
+        time.sleep(0.05)
+    transcriber.stop()
+    transcribe_thread.join()
+    wall = time.perf_counter() - wall_start
+    cpu_percent = 100 * (time.process_time() - cpu_start) / wall
+
+    phrases = [phrase for phrase in transcriber.phrases if phrase["text"]]
+    hypothesis = " ".join(phrase["text"] for phrase in phrases)
+    audio_seconds = recorder.source.DURATION
+    return {
+        "audio_seconds": round(audio_seconds, 2),
+        "decode_seconds": round(timed_model.decode_seconds, 3),
+        "rtf": round(timed_model.decode_seconds / audio_seconds, 4),
+        "wer": round(word_error_rate(reference, hypothesis), 4),
+        "reference_words": len(normalize_text(reference)),
+        "phrases": len(phrases),
+        "first_text_latency": [round(p["first_text"] - p["first_queued"], 3) for p in phrases],
+        "final_text_latency": [round(max(0.0, p["final_text"] - p["last_queued"]), 3) for p in phrases],
+        "cpu_percent": round(cpu_percent, 1),
+        "peak_rss_mb": rss.stop(),
+        "hypothesis": hypothesis
+    }
+
+def summarize(results):
+    audio_seconds = sum(r["audio_seconds"] for r in results)
+    reference_words = sum(r["reference_words"] for r in results)
+    first_text = [latency for r in results for latency in r["first_text_latency"]]
+    final_text = [latency for r in results for latency in r["final_text_latency"]]
+    summary = {
+        "audio_seconds": round(audio_seconds, 2),
+        "rtf": round(sum(r["decode_seconds"] for r in results) / audio_seconds, 4),
+        # word-weighted, so long fixtures count for more than short ones
+        "wer": round(sum(r["wer"] * r["reference_words"] for r in results) / reference_words, 4) if reference_words else None,
+        "cpu_percent": round(max(r["cpu_percent"] for r in results), 1),
+        "peak_rss_mb": max((r["peak_rss_mb"] for r in results if r["peak_rss_mb"] is not None), default=None)
+    }
+    for p in PERCENTILES:
+        summary[f"first_text_p{p}"] = percentile(first_text, p)
+        summary[f"final_text_p{p}"] = percentile(final_text, p)
+    return summary
+
+def host_info():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR, capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "node": platform.node(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+        "python": platform.python_version(),
+        "commit": commit
+    }
+
+def print_comparison(summary, baseline_path):
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    print(f"\nAgainst {baseline_path} (commit {baseline['host'].get('commit')}, {baseline['host'].get('node')}):")
+    print(f"{'metric':<18}{'baseline':>12}{'current':>12}{'change':>10}")
+    for metric in SUMMARY_METRICS:
+        old, new = baseline["summary"].get(metric), summary.get(metric)
+        change = f"{100 * (new - old) / old:+.1f}%" if old and new is not None else "-"
+        print(f"{metric:<18}{str(old):>12}{str(new):>12}{change:>10}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark real-time factor, latency and WER of the transcription pipeline")
+    parser.add_argument("--fixtures", default=FIXTURES_DIR, help="directory of .wav files with .txt reference transcripts")
+    parser.add_argument("--output", default="transcription_benchmark.json", help="where to write the JSON results")
+    parser.add_argument("--compare", help="earlier results to compare the summary against")
+    parser.add_argument("--speed", type=float, default=1.0, help="replay speed; latencies need real time (1.0)")
+    parser.add_argument("--api", action="store_true", help="transcribe with the API instead of the local model")
+    parser.add_argument("--model", help="local model size; defaults to the calibrated profile or tiny.en")
+    parser.add_argument("--no-streaming", action="store_true", help="re-decode whole phrases instead of streaming")
+    args = parser.parse_args()
+
+    fixtures = find_fixtures(args.fixtures)
+    if not fixtures:
+        raise SystemExit(f"[ERROR] No .wav/.txt fixture pairs found in {args.fixtures}; "
+                         "generate some with benchmarks/make_fixtures.py or add recordings")
+
+    import TranscriberModels
+    if args.model:
+        model = TranscriberModels.FasterWhisperTranscriber(config={"model_size": args.model})
+    else:
+        model = TranscriberModels.get_model(args.api)
+
+    results = []
+    print(f"{'fixture':<28}{'audio':>8}{'rtf':>8}{'wer':>8}{'first p50':>11}{'final p50':>11}{'cpu':>8}")
+    for name, path, reference in fixtures:
+        result = dict(fixture=name, **run_fixture(path, reference, model, args.speed, not args.no_streaming))
+        results.append(result)
+        print(f"{name:<28}{result['audio_seconds']:>7.1f}s{result['rtf']:>8.3f}{result['wer']:>8.3f}"
+              f"{str(percentile(result['first_text_latency'], 50)):>11}{str(percentile(result['final_text_latency'], 50)):>11}"
+              f"{result['cpu_percent']:>7.0f}%")
+    model.close()
+
+    summary = summarize(results)
+    report = {
+        "host": host_info(),
+        "config": {"api": args.api, "model": getattr(model, "config", None), "speed": args.speed,
+                   "streaming": not args.no_streaming},
+        "summary": summary,
+        "fixtures": results
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"[INFO] RTF {summary['rtf']}, WER {summary['wer']}, first text p95 {summary['first_text_p95']}s, "
+          f"final text p95 {summary['final_text_p95']}s; results written to {args.output}")
+    if args.compare:
+        print_comparison(summary, args.compare)
+
+if __name__ == "__main__":
+    main()
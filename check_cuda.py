@@ -1,10 +1,9 @@
-import torch
+import ctranslate2
 
-print('CUDA available:', torch.cuda.is_available())
-print('CUDA device count:', torch.cuda.device_count())
-if torch.cuda.is_available():
-    print('CUDA version:', torch.version.cuda)
-    print('CUDA device name:', torch.cuda.get_device_name(0))
+device_count = ctranslate2.get_cuda_device_count()
+print('CUDA available:', device_count > 0)
+print('CUDA device count:', device_count)
+if device_count > 0:
+    print('CUDA compute types:', ', '.join(sorted(ctranslate2.get_supported_compute_types('cuda'))))
 else:
-    print('CUDA version: None')
-    print('CUDA device name: None')
\ No newline at end of file
+    print('CUDA compute types: None')
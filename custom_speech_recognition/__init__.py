@@ -8,9 +8,8 @@ import tempfile
 import sys
 import subprocess
 import wave
-import aifc
 import math
-import audioop
+import re
 import collections
 import json
 import base64
@@ -19,6 +18,7 @@ import hashlib
 import hmac
 import time
 import uuid
+from datetime import datetime, timedelta
 
 try:
     import requests
@@ -33,6 +33,7 @@ from urllib.parse import urlencode
 from urllib.request import Request, urlopen
 from urllib.error import URLError, HTTPError
 
+from . import dsp
 from .audio import AudioData, get_flac_converter
 from .exceptions import (
     RequestError,
@@ -42,6 +43,8 @@ from .exceptions import (
     WaitTimeoutError,
 )
 from .recognizers import whisper
+from .vad import VoiceActivityDetector, EnergyVAD, WebRTCVAD, SileroVAD, get_default_vad
+from .capture import RingBuffer, RingBufferStream
 
 
 class AudioSource(object):
@@ -84,14 +87,19 @@ class Microphone(AudioSource):
             count = audio.get_device_count()  # obtain device count
             if device_index is not None:  # ensure device index is in range
                 assert 0 <= device_index < count, "Device index out of range ({} devices available; device index should be between 0 and {} inclusive)".format(count, count - 1)
-            if sample_rate is None:  # automatically set the sample rate to the hardware's default sample rate if not specified
+            try:
                 device_info = audio.get_device_info_by_index(device_index) if device_index is not None else audio.get_default_input_device_info()
+            except IOError:  # no default input device
+                device_info = None
+            if sample_rate is None:  # automatically set the sample rate to the hardware's default sample rate if not specified
+                assert device_info is not None, "No default input device available"
                 assert isinstance(device_info.get("defaultSampleRate"), (float, int)) and device_info["defaultSampleRate"] > 0, "Invalid device info returned from PyAudio: {}".format(device_info)
                 sample_rate = int(device_info["defaultSampleRate"])
         finally:
             audio.terminate()
 
         self.device_index = device_index
+        self.device_name = device_info.get("name") if device_info else None
         self.format = self.pyaudio_module.paInt16  # 16-bit int sampling
         self.SAMPLE_WIDTH = self.pyaudio_module.get_sample_size(self.format)  # size of each sample
         self.SAMPLE_RATE = sample_rate  # sampling rate in Hertz
@@ -110,8 +118,8 @@ class Microphone(AudioSource):
             import pyaudiowpatch as pyaudio
         except ImportError:
             raise AttributeError("Could not find PyAudio; check installation")
-        from distutils.version import LooseVersion
-        if LooseVersion(pyaudio.__version__) < LooseVersion("0.2.11"):
+        version = tuple(int(part) for part in re.findall(r"\d+", pyaudio.__version__)[:3])
+        if version < (0, 2, 11):
             raise AttributeError("PyAudio 0.2.11 or later is required (found version {})".format(pyaudio.__version__))
         return pyaudio
 
@@ -162,9 +170,7 @@ class Microphone(AudioSource):
                     continue
 
                 # compute RMS of debiased audio
-                energy = -audioop.rms(buffer, 2)
-                energy_bytes = bytes([energy & 0xFF, (energy >> 8) & 0xFF])
-                debiased_energy = audioop.rms(audioop.add(buffer, energy_bytes * (len(buffer) // 2), 2), 2)
+                debiased_energy = dsp.rms(dsp.bias(buffer, 2, -dsp.rms(buffer, 2)), 2)
 
                 if debiased_energy > 30:  # probably actually audio
                     result[device_index] = device_name
@@ -223,6 +229,47 @@ class Microphone(AudioSource):
                 self.pyaudio_stream.close()
 
 
+class CallbackMicrophone(Microphone):
+    """
+    A ``Microphone`` that captures in PyAudio's callback mode. Subclass of ``Microphone``.
+
+    PortAudio delivers blocks of ``block_duration`` seconds on its own thread into a ``RingBuffer`` holding ``buffer_duration`` seconds of audio, and ``CHUNK`` is set to the block size so that ``recognizer_instance.listen`` computes energy or voice activity once per block instead of once per tiny read. This matters most for high-rate multichannel loopback devices, where small blocks spend a whole core in per-buffer Python overhead.
+
+    Blocks that arrive while the ring buffer is full are dropped and counted in ``overruns``.
+    """
+    def __init__(self, device_index=None, sample_rate=None, block_duration=0.1, buffer_duration=5, speaker=False, channels=1):
+        assert block_duration > 0, "Block duration must be positive"
+        assert buffer_duration >= 2 * block_duration, "Buffer duration must hold at least two blocks"
+        super().__init__(device_index=device_index, sample_rate=sample_rate, speaker=speaker, channels=channels)
+        if not speaker:
+            self.channels = 1  # microphones are always opened in mono
+        self.CHUNK = max(1, int(round(self.SAMPLE_RATE * block_duration)))
+        self.buffer_duration = buffer_duration
+        self.ring_buffer = None
+
+    @property
+    def overruns(self):
+        return self.ring_buffer.overruns if self.ring_buffer is not None else 0
+
+    def __enter__(self):
+        assert self.stream is None, "This audio source is already inside a context manager"
+        self.audio = self.pyaudio_module.PyAudio()
+
+        frame_bytes = self.SAMPLE_WIDTH * self.channels
+        self.ring_buffer = RingBuffer(int(self.SAMPLE_RATE * self.buffer_duration) * frame_bytes)
+        stream = RingBufferStream(self.ring_buffer, frame_bytes, self.pyaudio_module.paContinue)
+        try:
+            stream.pyaudio_stream = self.audio.open(
+                input_device_index=self.device_index, channels=self.channels, format=self.format,
+                rate=self.SAMPLE_RATE, frames_per_buffer=self.CHUNK, input=True,
+                stream_callback=stream.callback,
+            )
+            self.stream = stream
+        except Exception:
+            self.audio.terminate()
+        return self
+
+
 class AudioFile(AudioSource):
     """
     Creates a new ``AudioFile`` instance given a WAV/AIFF/FLAC audio file ``filename_or_fileobject``. Subclass of ``AudioSource``.
@@ -255,20 +302,27 @@ class AudioFile(AudioSource):
         try:
             # attempt to read the file as WAV
             self.audio_reader = wave.open(self.filename_or_fileobject, "rb")
-            self.little_endian = True  # RIFF WAV is a little-endian format (most ``audioop`` operations assume that the frames are stored in little-endian form)
+            self.little_endian = True  # RIFF WAV is a little-endian format (the ``dsp`` functions assume that the frames are stored in little-endian form)
         except (wave.Error, EOFError):
+            try:
+                import aifc  # removed from the standard library in Python 3.13
+            except ImportError:
+                aifc = None
+            aiff_errors = (aifc.Error, EOFError) if aifc is not None else (EOFError,)
             try:
                 # attempt to read the file as AIFF
+                if aifc is None:
+                    raise EOFError("AIFF is not supported without the aifc module")
                 self.audio_reader = aifc.open(self.filename_or_fileobject, "rb")
                 self.little_endian = False  # AIFF is a big-endian format
-            except (aifc.Error, EOFError):
+            except aiff_errors:
                 # attempt to read the file as FLAC
                 if hasattr(self.filename_or_fileobject, "read"):
                     flac_data = self.filename_or_fileobject.read()
                 else:
                     with open(self.filename_or_fileobject, "rb") as f: flac_data = f.read()
 
-                # run the FLAC converter with the FLAC data to get the AIFF data
+                # run the FLAC converter with the FLAC data to get AIFF data, or WAV data where aifc is unavailable
                 flac_converter = get_flac_converter()
                 if os.name == "nt":  # on Windows, specify that the process is to be started without showing a console window
                     startup_info = subprocess.STARTUPINFO()
@@ -278,33 +332,31 @@ class AudioFile(AudioSource):
                     startup_info = None  # default startupinfo
                 process = subprocess.Popen([
                     flac_converter,
-                    "--stdout", "--totally-silent",  # put the resulting AIFF file in stdout, and make sure it's not mixed with any program output
-                    "--decode", "--force-aiff-format",  # decode the FLAC file into an AIFF file
+                    "--stdout", "--totally-silent",  # put the resulting file in stdout, and make sure it's not mixed with any program output
+                    "--decode",  # decode the FLAC file, into WAV unless AIFF is asked for
+                ] + (["--force-aiff-format"] if aifc is not None else []) + [
                     "-",  # the input FLAC file contents will be given in stdin
                 ], stdin=subprocess.PIPE, stdout=subprocess.PIPE, startupinfo=startup_info)
-                aiff_data, _ = process.communicate(flac_data)
-                aiff_file = io.BytesIO(aiff_data)
+                decoded_data, _ = process.communicate(flac_data)
+                decoded_file = io.BytesIO(decoded_data)
                 try:
-                    self.audio_reader = aifc.open(aiff_file, "rb")
-                except (aifc.Error, EOFError):
+                    if aifc is not None:
+                        self.audio_reader = aifc.open(decoded_file, "rb")
+                        self.little_endian = False  # AIFF is a big-endian format
+                    else:
+                        self.audio_reader = wave.open(decoded_file, "rb")
+                        self.little_endian = True
+                except aiff_errors + (wave.Error,):
                     raise ValueError("Audio file could not be read as PCM WAV, AIFF/AIFF-C, or Native FLAC; check if file is corrupted or in another format")
-                self.little_endian = False  # AIFF is a big-endian format
         assert 1 <= self.audio_reader.getnchannels() <= 2, "Audio must be mono or stereo"
         self.SAMPLE_WIDTH = self.audio_reader.getsampwidth()
 
-        # 24-bit audio needs some special handling for old Python versions (workaround for https://bugs.python.org/issue12866)
-        samples_24_bit_pretending_to_be_32_bit = False
-        if self.SAMPLE_WIDTH == 3:  # 24-bit audio
-            try: audioop.bias(b"", self.SAMPLE_WIDTH, 0)  # test whether this sample width is supported (for example, ``audioop`` in Python 3.3 and below don't support sample width 3, while Python 3.4+ do)
-            except audioop.error:  # this version of audioop doesn't support 24-bit audio (probably Python 3.3 or less)
-                samples_24_bit_pretending_to_be_32_bit = True  # while the ``AudioFile`` instance will outwardly appear to be 32-bit, it will actually internally be 24-bit
-                self.SAMPLE_WIDTH = 4  # the ``AudioFile`` instance should present itself as a 32-bit stream now, since we'll be converting into 32-bit on the fly when reading
 
         self.SAMPLE_RATE = self.audio_reader.getframerate()
         self.CHUNK = 4096
         self.FRAME_COUNT = self.audio_reader.getnframes()
         self.DURATION = self.FRAME_COUNT / float(self.SAMPLE_RATE)
-        self.stream = AudioFile.AudioFileStream(self.audio_reader, self.little_endian, samples_24_bit_pretending_to_be_32_bit)
+        self.stream = AudioFile.AudioFileStream(self.audio_reader, self.little_endian)
         return self
 
     def __exit__(self, exc_type, exc_value, traceback):
@@ -314,10 +366,9 @@ class AudioFile(AudioSource):
         self.DURATION = None
 
     class AudioFileStream(object):
-        def __init__(self, audio_reader, little_endian, samples_24_bit_pretending_to_be_32_bit):
+        def __init__(self, audio_reader, little_endian):
             self.audio_reader = audio_reader  # an audio file object (e.g., a `wave.Wave_read` instance)
             self.little_endian = little_endian  # whether the audio data is little-endian (when working with big-endian things, we'll have to convert it to little-endian before we process it)
-            self.samples_24_bit_pretending_to_be_32_bit = samples_24_bit_pretending_to_be_32_bit  # this is true if the audio is 24-bit audio, but 24-bit audio isn't supported, so we have to pretend that this is 32-bit audio and convert it on the fly
 
         def read(self, size=-1):
             buffer = self.audio_reader.readframes(self.audio_reader.getnframes() if size == -1 else size)
@@ -325,17 +376,83 @@ class AudioFile(AudioSource):
 
             sample_width = self.audio_reader.getsampwidth()
             if not self.little_endian:  # big endian format, convert to little endian on the fly
-                if hasattr(audioop, "byteswap"):  # ``audioop.byteswap`` was only added in Python 3.4 (incidentally, that also means that we don't need to worry about 24-bit audio being unsupported, since Python 3.4+ always has that functionality)
-                    buffer = audioop.byteswap(buffer, sample_width)
-                else:  # manually reverse the bytes of each sample, which is slower but works well enough as a fallback
-                    buffer = buffer[sample_width - 1::-1] + b"".join(buffer[i + sample_width:i:-1] for i in range(sample_width - 1, len(buffer), sample_width))
-
-            # workaround for https://bugs.python.org/issue12866
-            if self.samples_24_bit_pretending_to_be_32_bit:  # we need to convert samples from 24-bit to 32-bit before we can process them with ``audioop`` functions
-                buffer = b"".join(b"\x00" + buffer[i:i + sample_width] for i in range(0, len(buffer), sample_width))  # since we're in little endian, we prepend a zero byte to each 24-bit sample to get a 32-bit sample
-                sample_width = 4  # make sure we thread the buffer as 32-bit audio now, after converting it from 24-bit audio
+                buffer = dsp.byteswap(buffer, sample_width)
+
             if self.audio_reader.getnchannels() != 1:  # stereo audio
-                buffer = audioop.tomono(buffer, sample_width, 1, 1)  # convert stereo audio data to mono
+                buffer = dsp.tomono(buffer, sample_width, 1, 1)  # convert stereo audio data to mono
+            return buffer
+
+
+class ReplayAudioSource(AudioSource):
+    """
+    Replays one or more WAV/AIFF/FLAC files back to back as if they were a live input device. Subclass of ``AudioSource``.
+
+    ``files`` is a path or file object, or a list of them. Every file is decoded up front into 16-bit mono audio at the sample rate of the first file, so reads never touch the disk.
+
+    ``speed`` sets the pacing: ``1.0`` delivers audio in real time, ``4.0`` four times faster, and ``None`` as fast as it can be read. Each read returns ``block_duration`` seconds of audio. Because wall-clock timestamps are meaningless at any speed other than real time, ``now()`` returns a virtual clock that starts at ``start_time`` and advances with the audio read so far; recorders use it to timestamp what they capture.
+
+    Once the audio is exhausted, reads return an empty byte string and ``finished`` is set.
+    """
+    def __init__(self, files, speed=1.0, block_duration=0.1, start_time=None):
+        assert speed is None or speed > 0, "Speed must be None or a positive number"
+        assert block_duration > 0, "Block duration must be positive"
+        if isinstance(files, str) or hasattr(files, "read"):
+            files = [files]
+        assert files, "At least one file is required"
+
+        segments = []
+        self.SAMPLE_RATE = None
+        self.SAMPLE_WIDTH = 2
+        for file in files:
+            with AudioFile(file) as source:
+                audio = AudioData(source.stream.read(), source.SAMPLE_RATE, source.SAMPLE_WIDTH)
+            self.SAMPLE_RATE = self.SAMPLE_RATE or audio.sample_rate
+            segments.append(audio.get_raw_data(convert_rate=self.SAMPLE_RATE, convert_width=self.SAMPLE_WIDTH))
+        self.frame_data = b"".join(segments)
+        self.channels = 1
+        self.CHUNK = max(1, int(round(self.SAMPLE_RATE * block_duration)))
+        self.DURATION = len(self.frame_data) / float(self.SAMPLE_RATE * self.SAMPLE_WIDTH)
+
+        self.speed = speed
+        self.start_time = start_time or datetime.utcnow()
+        self.position = 0  # bytes of ``frame_data`` read so far
+        self.finished = threading.Event()
+        self.stream = None
+
+    def now(self):
+        return self.start_time + timedelta(seconds=self.position / float(self.SAMPLE_RATE * self.SAMPLE_WIDTH))
+
+    def __enter__(self):
+        assert self.stream is None, "This audio source is already inside a context manager"
+        self.stream = ReplayAudioSource.ReplayStream(self)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stream = None
+
+    class ReplayStream(object):
+        def __init__(self, source):
+            self.source = source  # the ``ReplayAudioSource`` being played; its ``position`` carries over between streams
+            self.start_position = source.position
+            self.start_time = time.monotonic()
+
+        @property
+        def finished(self):
+            return self.source.finished.is_set()
+
+        def read(self, size):
+            source = self.source
+            buffer = source.frame_data[source.position:source.position + size * source.SAMPLE_WIDTH]
+            source.position += len(buffer)
+            if source.position >= len(source.frame_data):
+                source.finished.set()
+
+            if buffer and source.speed is not None:
+                # a live device returns a block once all of it has been captured
+                due = (source.position - self.start_position) / float(source.SAMPLE_RATE * source.SAMPLE_WIDTH) / source.speed
+                delay = due - (time.monotonic() - self.start_time)
+                if delay > 0:
+                    time.sleep(delay)
             return buffer
 
 
@@ -353,6 +470,8 @@ class Recognizer(AudioSource):
 
         self.phrase_threshold = 0.3  # minimum seconds of speaking audio before we consider the speaking audio a phrase - values below this are ignored (for filtering out clicks and pops)
         self.non_speaking_duration = 0.5  # seconds of non-speaking audio to keep on both sides of the recording
+        self.vad = None  # streaming ``VoiceActivityDetector`` that replaces the energy threshold when set
+        self.silence_callback = None  # called as ``silence_callback(buffer, sample_rate, sample_width)`` with every non-speech buffer heard while waiting for a phrase to start
 
     def record(self, source, duration=None, offset=None):
         """
@@ -407,7 +526,7 @@ class Recognizer(AudioSource):
             elapsed_time += seconds_per_buffer
             if elapsed_time > duration: break
             buffer = source.stream.read(source.CHUNK)
-            energy = audioop.rms(buffer, source.SAMPLE_WIDTH)  # energy of the audio signal
+            energy = dsp.rms(buffer, source.SAMPLE_WIDTH)  # energy of the audio signal
 
             # dynamically adjust the energy threshold using asymmetric weighted average
             damping = self.dynamic_energy_adjustment_damping ** seconds_per_buffer  # account for different chunk sizes and rates
@@ -451,7 +570,7 @@ class Recognizer(AudioSource):
             frames.append(buffer)
 
             # resample audio to the required sample rate
-            resampled_buffer, resampling_state = audioop.ratecv(buffer, source.SAMPLE_WIDTH, 1, source.SAMPLE_RATE, snowboy_sample_rate, resampling_state)
+            resampled_buffer, resampling_state = dsp.ratecv(buffer, source.SAMPLE_WIDTH, 1, source.SAMPLE_RATE, snowboy_sample_rate, resampling_state)
             resampled_frames.append(resampled_buffer)
             if time.time() - last_check > check_interval:
                 # run Snowboy on the resampled audio
@@ -511,8 +630,13 @@ class Recognizer(AudioSource):
                         frames.popleft()
 
                     # detect whether speaking has started on audio input
-                    energy = audioop.rms(buffer, source.SAMPLE_WIDTH)  # energy of the audio signal
+                    if self.vad is not None:
+                        if self.vad.is_speech(buffer, source.SAMPLE_RATE, source.SAMPLE_WIDTH, getattr(source, "channels", 1)): break
+                        if self.silence_callback is not None: self.silence_callback(buffer, source.SAMPLE_RATE, source.SAMPLE_WIDTH)
+                        continue
+                    energy = dsp.rms(buffer, source.SAMPLE_WIDTH)  # energy of the audio signal
                     if energy > self.energy_threshold: break
+                    if self.silence_callback is not None: self.silence_callback(buffer, source.SAMPLE_RATE, source.SAMPLE_WIDTH)
 
                     # dynamically adjust the energy threshold using asymmetric weighted average
                     if self.dynamic_energy_threshold:
@@ -542,8 +666,11 @@ class Recognizer(AudioSource):
                 phrase_count += 1
 
                 # check if speaking has stopped for longer than the pause threshold on the audio input
-                energy = audioop.rms(buffer, source.SAMPLE_WIDTH)  # unit energy of the audio signal within the buffer
-                if energy > self.energy_threshold:
+                if self.vad is not None:
+                    speaking = self.vad.is_speech(buffer, source.SAMPLE_RATE, source.SAMPLE_WIDTH, getattr(source, "channels", 1))
+                else:
+                    speaking = dsp.rms(buffer, source.SAMPLE_WIDTH) > self.energy_threshold  # unit energy of the audio signal within the buffer
+                if speaking:
                     pause_count = 0
                 else:
                     pause_count += 1
@@ -558,7 +685,9 @@ class Recognizer(AudioSource):
         for i in range(pause_count - non_speaking_buffer_count): frames.pop()  # remove extra non-speaking frames at the end
         frame_data = b"".join(frames)
 
-        return AudioData(frame_data, source.SAMPLE_RATE, source.SAMPLE_WIDTH)
+        audio = AudioData(frame_data, source.SAMPLE_RATE, source.SAMPLE_WIDTH)
+        audio.trailing_seconds = max(0, pause_count - non_speaking_buffer_count) * seconds_per_buffer
+        return audio
 
     def listen_in_background(self, source, callback, phrase_time_limit=None):
         """
@@ -581,7 +710,9 @@ class Recognizer(AudioSource):
                     except WaitTimeoutError:  # listening timed out, just try again
                         pass
                     else:
-                        if running[0]: callback(self, audio)
+                        # the last phrase of a source that ran out is delivered even if the stop raced it
+                        if running[0] or getattr(s.stream, "finished", False): callback(self, audio)
+                    if getattr(s.stream, "finished", False): break  # sources with a fixed amount of audio, like ``ReplayAudioSource``, have run out
 
         def stopper(wait_for_stop=True):
             running[0] = False
@@ -1,5 +1,3 @@
-import aifc
-import audioop
 import io
 import os
 import platform
@@ -8,6 +6,13 @@ import subprocess
 import sys
 import wave
 
+from . import dsp
+
+try:
+    import soundfile  # encodes FLAC in-process through libsndfile
+except ImportError:
+    soundfile = None
+
 
 class AudioData(object):
     """
@@ -20,7 +25,10 @@ class AudioData(object):
     The audio data is assumed to have a sample rate of ``sample_rate`` samples per second (Hertz).
 
     Usually, instances of this class are obtained from ``recognizer_instance.record`` or ``recognizer_instance.listen``, or in the callback for ``recognizer_instance.listen_in_background``, rather than instantiating them directly.
+
+    ``trailing_seconds`` is how much audio was read from the source after the end of ``frame_data`` and then discarded, such as the end of the pause ``recognizer_instance.listen`` waits for; subtract it from the time the audio was received to get the time ``frame_data`` ends.
     """
+    trailing_seconds = 0.0
 
     def __init__(self, frame_data, sample_rate, sample_width):
         assert sample_rate > 0, "Sample rate must be a positive integer"
@@ -82,13 +90,13 @@ class AudioData(object):
 
         # make sure unsigned 8-bit audio (which uses unsigned samples) is handled like higher sample width audio (which uses signed samples)
         if self.sample_width == 1:
-            raw_data = audioop.bias(
+            raw_data = dsp.bias(
                 raw_data, 1, -128
             )  # subtract 128 from every sample to make them act like signed samples
 
         # resample audio at the desired rate if specified
         if convert_rate is not None and self.sample_rate != convert_rate:
-            raw_data, _ = audioop.ratecv(
+            raw_data, _ = dsp.ratecv(
                 raw_data,
                 self.sample_width,
                 1,
@@ -99,35 +107,13 @@ class AudioData(object):
 
         # convert samples to desired sample width if specified
         if convert_width is not None and self.sample_width != convert_width:
-            if (
-                convert_width == 3
-            ):  # we're converting the audio into 24-bit (workaround for https://bugs.python.org/issue12866)
-                raw_data = audioop.lin2lin(
-                    raw_data, self.sample_width, 4
-                )  # convert audio into 32-bit first, which is always supported
-                try:
-                    audioop.bias(
-                        b"", 3, 0
-                    )  # test whether 24-bit audio is supported (for example, ``audioop`` in Python 3.3 and below don't support sample width 3, while Python 3.4+ do)
-                except (
-                    audioop.error
-                ):  # this version of audioop doesn't support 24-bit audio (probably Python 3.3 or less)
-                    raw_data = b"".join(
-                        raw_data[i + 1 : i + 4]
-                        for i in range(0, len(raw_data), 4)
-                    )  # since we're in little endian, we discard the first byte from each 32-bit sample to get a 24-bit sample
-                else:  # 24-bit audio fully supported, we don't need to shim anything
-                    raw_data = audioop.lin2lin(
-                        raw_data, self.sample_width, convert_width
-                    )
-            else:
-                raw_data = audioop.lin2lin(
-                    raw_data, self.sample_width, convert_width
-                )
+            raw_data = dsp.lin2lin(
+                raw_data, self.sample_width, convert_width
+            )
 
         # if the output is 8-bit audio with unsigned samples, convert the samples we've been treating as signed to unsigned again
         if convert_width == 1:
-            raw_data = audioop.bias(
+            raw_data = dsp.bias(
                 raw_data, 1, 128
             )  # add 128 to every sample to make them act like unsigned samples again
 
@@ -183,15 +169,9 @@ class AudioData(object):
         )
 
         # the AIFF format is big-endian, so we need to convert the little-endian raw data to big-endian
-        if hasattr(
-            audioop, "byteswap"
-        ):  # ``audioop.byteswap`` was only added in Python 3.4
-            raw_data = audioop.byteswap(raw_data, sample_width)
-        else:  # manually reverse the bytes of each sample, which is slower but works well enough as a fallback
-            raw_data = raw_data[sample_width - 1 :: -1] + b"".join(
-                raw_data[i + sample_width : i : -1]
-                for i in range(sample_width - 1, len(raw_data), sample_width)
-            )
+        raw_data = dsp.byteswap(raw_data, sample_width)
+
+        import aifc  # removed from the standard library in Python 3.13, so only needed when AIFF data is requested
 
         # generate the AIFF-C file contents
         with io.BytesIO() as aiff_file:
@@ -227,8 +207,15 @@ class AudioData(object):
         ):  # resulting WAV data would be 32-bit, which is not convertable to FLAC using our encoder
             convert_width = 3  # the largest supported sample width is 24-bit, so we'll limit the sample width to that
 
-        # run the FLAC converter with the WAV data to get the FLAC data
         wav_data = self.get_wav_data(convert_rate, convert_width)
+        if soundfile is not None:  # encode in-process rather than starting a converter for every call
+            sample_width = self.sample_width if convert_width is None else convert_width
+            samples, sample_rate = soundfile.read(io.BytesIO(wav_data), dtype="int32")
+            with io.BytesIO() as flac_file:
+                soundfile.write(flac_file, samples, sample_rate, format="FLAC", subtype="PCM_{}".format("S8" if sample_width == 1 else 8 * sample_width))
+                return flac_file.getvalue()
+
+        # run the FLAC converter with the WAV data to get the FLAC data
         flac_converter = get_flac_converter()
         if (
             os.name == "nt"
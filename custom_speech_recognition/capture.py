@@ -0,0 +1,89 @@
+import threading
+
+
+class RingBuffer(object):
+    """
+    Fixed-size byte ring buffer for exactly one writer thread and one reader thread.
+
+    Each side only ever advances its own position, so no lock is needed: the writer (the PortAudio callback) never blocks, and the reader waits on an event that the writer sets after every write. When the reader falls more than ``capacity`` bytes behind, incoming blocks are dropped and counted in ``overruns`` rather than overwriting audio that hasn't been read yet.
+    """
+    def __init__(self, capacity):
+        assert isinstance(capacity, int) and capacity > 0, "Capacity must be a positive integer"
+        self.capacity = capacity
+        self.buffer = bytearray(capacity)
+        self.write_position = 0  # total bytes ever written; only the writer changes this
+        self.read_position = 0  # total bytes ever read; only the reader changes this
+        self.data_ready = threading.Event()
+        self.closed = False
+        self.overruns = 0
+        self.dropped_bytes = 0
+
+    def available(self):
+        return self.write_position - self.read_position
+
+    def write(self, data):
+        size = len(data)
+        if size > self.capacity - self.available():
+            self.overruns += 1
+            self.dropped_bytes += size
+            return False
+
+        start = self.write_position % self.capacity
+        first = min(size, self.capacity - start)
+        self.buffer[start:start + first] = data[:first]
+        self.buffer[:size - first] = data[first:]
+        self.write_position += size
+        self.data_ready.set()
+        return True
+
+    def read(self, size, timeout=None):
+        """
+        Blocks until ``size`` bytes are available and returns them. Once the buffer is closed, returns whatever is left, which is an empty byte string at the end of the stream. Returns fewer bytes if ``timeout`` seconds pass first.
+        """
+        while self.available() < size and not self.closed:
+            self.data_ready.clear()
+            if self.available() >= size or self.closed:  # the writer may have written between the check and the clear
+                break
+            if not self.data_ready.wait(timeout):
+                break
+
+        size = min(size, self.available())
+        start = self.read_position % self.capacity
+        first = min(size, self.capacity - start)
+        data = bytes(self.buffer[start:start + first]) + bytes(self.buffer[:size - first])
+        self.read_position += size
+        return data
+
+    def close(self):
+        self.closed = True
+        self.data_ready.set()
+
+
+class RingBufferStream(object):
+    """
+    Stream returned by ``CallbackMicrophone``: PortAudio delivers whole blocks to ``callback`` on its own thread, and ``read`` hands them to the recognizer from the ring buffer.
+
+    ``read`` gives up after ``read_timeout`` seconds without audio (for example when the device disappears) and returns what it has, so listener threads can still notice that they were asked to stop.
+    """
+    def __init__(self, ring_buffer, frame_bytes, continue_flag, read_timeout=1.0):
+        self.ring_buffer = ring_buffer
+        self.frame_bytes = frame_bytes
+        self.continue_flag = continue_flag
+        self.read_timeout = read_timeout
+        self.pyaudio_stream = None
+
+    def callback(self, in_data, frame_count, time_info, status):
+        self.ring_buffer.write(in_data)
+        return None, self.continue_flag
+
+    def read(self, size):
+        return self.ring_buffer.read(size * self.frame_bytes, self.read_timeout)
+
+    def close(self):
+        self.ring_buffer.close()
+        try:
+            # sometimes, if the stream isn't stopped, closing the stream throws an exception
+            if not self.pyaudio_stream.is_stopped():
+                self.pyaudio_stream.stop_stream()
+        finally:
+            self.pyaudio_stream.close()
@@ -0,0 +1,167 @@
+"""
+Vectorised NumPy replacements for the ``audioop`` functions this package used to depend on.
+
+``audioop`` was removed in Python 3.13 and processes long buffers one sample at a time. Every function here takes and returns little-endian signed PCM byte strings with the same arguments as its ``audioop`` counterpart, so callers can switch over one call at a time. Sample widths of 1, 2, 3 and 4 bytes are supported; like ``audioop``, 8-bit samples are treated as signed.
+"""
+
+import numpy as np
+
+
+SIGNED_TYPES = {1: np.dtype("i1"), 2: np.dtype("<i2"), 4: np.dtype("<i4")}
+UNSIGNED_TYPES = {1: np.dtype("u1"), 2: np.dtype("<u2"), 4: np.dtype("<u4")}
+CHUNK_SAMPLES = 1 << 16  # reductions run over cache-sized chunks instead of converting the whole buffer at once
+
+
+def to_array(data, sample_width):
+    """Returns a read-only view of the samples in ``data`` (24-bit audio is copied into an int32 array)"""
+    assert 1 <= sample_width <= 4, "Sample width must be between 1 and 4 inclusive"
+    data = data[:len(data) - len(data) % sample_width]
+    if sample_width in SIGNED_TYPES:
+        return np.frombuffer(data, dtype=SIGNED_TYPES[sample_width])
+    # 24-bit: put each sample in the top three bytes of an int32, then shift it back down keeping the sign
+    padded = np.zeros((len(data) // 3, 4), dtype=np.uint8)
+    padded[:, 1:] = np.frombuffer(data, dtype=np.uint8).reshape(-1, 3)
+    return padded.view("<i4").reshape(-1) >> 8
+
+
+def from_array(samples, sample_width):
+    """Converts an array of samples back to PCM bytes, clipping anything outside the range of ``sample_width``"""
+    assert 1 <= sample_width <= 4, "Sample width must be between 1 and 4 inclusive"
+    target = SIGNED_TYPES.get(sample_width, np.dtype("<i4"))
+    limit = 1 << (8 * sample_width - 1)
+    if samples.dtype.kind == "f":
+        samples = np.rint(samples, out=samples) if samples.flags.writeable else np.rint(samples)
+        np.clip(samples, -limit, limit - 1, out=samples)
+    elif samples.dtype.itemsize > sample_width:
+        samples = np.clip(samples, -limit, limit - 1)
+    samples = samples.astype(target, copy=False)
+    if sample_width == 3:
+        return samples.view(np.uint8).reshape(-1, 4)[:, :3].tobytes()
+    return samples.tobytes()
+
+
+def to_float32(data, sample_width):
+    """Returns the samples in ``data`` scaled to float32 in [-1, 1)"""
+    samples = to_array(data, sample_width).astype(np.float32)
+    samples *= 1.0 / (1 << (8 * sample_width - 1))
+    return samples
+
+
+def rms(data, sample_width):
+    """Root mean square of the samples, as an integer (``audioop.rms``)"""
+    samples = to_array(data, sample_width)
+    if len(samples) == 0:
+        return 0
+    total = 0.0
+    for start in range(0, len(samples), CHUNK_SAMPLES):
+        chunk = samples[start:start + CHUNK_SAMPLES].astype(np.float64)
+        total += np.dot(chunk, chunk)
+    return int(np.sqrt(total / len(samples)))
+
+
+def bias(data, sample_width, bias):
+    """Adds ``bias`` to every sample, wrapping around on overflow (``audioop.bias``)"""
+    if sample_width in UNSIGNED_TYPES:
+        # unsigned arithmetic wraps around exactly like audioop does
+        dtype = UNSIGNED_TYPES[sample_width]
+        samples = np.frombuffer(data[:len(data) - len(data) % sample_width], dtype=dtype)
+        return (samples + dtype.type(bias % (1 << (8 * sample_width)))).tobytes()
+    modulus = 1 << (8 * sample_width)
+    samples = (to_array(data, sample_width).astype(np.int64) + bias) % modulus
+    samples[samples >= modulus // 2] -= modulus
+    return from_array(samples, sample_width)
+
+
+def lin2lin(data, sample_width, new_width):
+    """Converts samples between widths by shifting, keeping the most significant bits (``audioop.lin2lin``)"""
+    if sample_width == new_width:
+        return data
+    shift = 8 * (new_width - sample_width)
+    if shift > 0:
+        samples = to_array(data, sample_width).astype(SIGNED_TYPES.get(new_width, np.dtype("<i4")))
+        samples <<= shift
+    else:
+        samples = to_array(data, sample_width) >> -shift
+    return from_array(samples, new_width)
+
+
+def byteswap(data, sample_width):
+    """Swaps the byte order of every sample (``audioop.byteswap``)"""
+    data = data[:len(data) - len(data) % sample_width]
+    if sample_width in UNSIGNED_TYPES:
+        return np.frombuffer(data, dtype=UNSIGNED_TYPES[sample_width]).byteswap().tobytes()
+    return np.frombuffer(data, dtype=np.uint8).reshape(-1, sample_width)[:, ::-1].tobytes()
+
+
+def downmix_array(samples, channels):
+    """Averages interleaved ``channels`` into a mono array"""
+    if channels == 1:
+        return samples
+    return samples[:len(samples) - len(samples) % channels].reshape(-1, channels).mean(axis=1)
+
+
+def downmix(data, sample_width, channels):
+    """Averages interleaved multichannel audio into mono"""
+    if channels == 1:
+        return data
+    return from_array(downmix_array(to_array(data, sample_width), channels), sample_width)
+
+
+def tomono(data, sample_width, lfactor, rfactor):
+    """Mixes stereo audio into mono as ``left * lfactor + right * rfactor`` (``audioop.tomono``)"""
+    frames = to_array(data, sample_width)
+    frames = frames[:len(frames) - len(frames) % 2].reshape(-1, 2)
+    if float(lfactor).is_integer() and float(rfactor).is_integer():
+        mixed = frames[:, 0].astype(np.int64) * int(lfactor)
+        mixed += frames[:, 1] * int(rfactor)
+    else:
+        mixed = frames[:, 0] * np.float32(lfactor)
+        mixed += frames[:, 1] * np.float32(rfactor)
+    return from_array(mixed, sample_width)
+
+
+def resample_array(samples, sample_rate, new_rate):
+    """
+    Resamples mono ``samples`` from ``sample_rate`` to ``new_rate``. Integer downsampling ratios (48 kHz or 32 kHz to 16 kHz) average each group of input samples, which also low-passes; other ratios interpolate linearly.
+    """
+    if sample_rate == new_rate or len(samples) == 0:
+        return samples
+    if sample_rate % new_rate == 0:
+        factor = sample_rate // new_rate
+        return samples[:len(samples) - len(samples) % factor].reshape(-1, factor).mean(axis=1)
+    target_length = int(round(len(samples) * new_rate / sample_rate))
+    positions = np.arange(target_length) * (sample_rate / new_rate)
+    return np.interp(positions, np.arange(len(samples)), samples)
+
+
+def resample(data, sample_width, sample_rate, new_rate):
+    """Resamples a whole mono buffer in one pass; use ``ratecv`` for audio that arrives in pieces"""
+    if sample_rate == new_rate:
+        return data
+    return from_array(resample_array(to_array(data, sample_width), sample_rate, new_rate), sample_width)
+
+
+def ratecv(data, sample_width, channels, sample_rate, new_rate, state, weightA=1, weightB=0):
+    """
+    Converts the sample rate of consecutive buffers by linear interpolation (``audioop.ratecv``). Returns ``(converted_data, new_state)``; pass ``new_state`` back in with the next buffer of the same stream, or ``None`` for the first one. ``weightA`` and ``weightB`` are accepted for compatibility and ignored.
+    """
+    frames = to_array(data, sample_width)
+    frames = frames[:len(frames) - len(frames) % channels].reshape(-1, channels)
+    if state is not None:
+        previous_frame, position = state
+        frames = np.concatenate([previous_frame, frames])
+    else:
+        position = 0.0
+    if len(frames) < 2:
+        return b"", (frames[-1:], position) if len(frames) else state
+
+    step = sample_rate / new_rate
+    positions = np.arange(position, len(frames) - 1, step)
+    if float(step).is_integer() and float(position).is_integer():
+        # integer ratio landing on whole samples: interpolation reduces to picking every ``step``-th frame
+        converted = frames[int(position):len(frames) - 1:int(step)]
+    else:
+        indices = np.arange(len(frames))
+        converted = np.column_stack([np.interp(positions, indices, frames[:, c]) for c in range(channels)])
+    next_position = (positions[-1] + step if len(positions) else position) - (len(frames) - 1)
+    return from_array(converted.reshape(-1), sample_width), (frames[-1:].copy(), next_position)
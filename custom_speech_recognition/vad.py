@@ -0,0 +1,145 @@
+from . import dsp
+from .exceptions import SetupError
+
+
+class VoiceActivityDetector(object):
+    """
+    Base class for voice activity detectors, which decide whether audio contains speech so that non-speech audio never reaches a recognizer.
+
+    Subclasses implement ``is_speech``, which classifies a single buffer of little-endian PCM audio. Detectors with ``streaming = True`` keep enough state to be called on every buffer read by ``recognizer_instance.listen``; the others are only used to trim whole phrases with ``trim``.
+    """
+    streaming = True
+    frame_duration = 0.03  # seconds of audio per frame when classifying a whole phrase
+
+    def is_speech(self, buffer, sample_rate, sample_width, channels=1):
+        raise NotImplementedError("this is an abstract class")
+
+    def supports(self, sample_rate):
+        return True
+
+    def is_speech_frame(self, frame, sample_rate, sample_width):
+        """Classifies one mono frame without touching any state kept between ``is_speech`` calls"""
+        return self.is_speech(frame, sample_rate, sample_width)
+
+    def speech_segments(self, frame_data, sample_rate, sample_width):
+        """
+        Returns a list of ``(start_byte, end_byte)`` tuples covering the speech in ``frame_data``, which must be mono audio.
+        """
+        frame_bytes = int(sample_rate * self.frame_duration) * sample_width
+        segments = []
+        for start in range(0, len(frame_data) - frame_bytes + 1, frame_bytes):
+            if self.is_speech_frame(frame_data[start:start + frame_bytes], sample_rate, sample_width):
+                if segments and segments[-1][1] == start:
+                    segments[-1] = (segments[-1][0], start + frame_bytes)
+                else:
+                    segments.append((start, start + frame_bytes))
+        return segments
+
+    def speech_range(self, frame_data, sample_rate, sample_width, padding=0.2):
+        """
+        Returns the ``(start_byte, end_byte)`` range ``trim`` keeps, or ``None`` if there is no speech at all.
+        """
+        segments = self.speech_segments(frame_data, sample_rate, sample_width)
+        if not segments:
+            return None
+        padding_bytes = int(padding * sample_rate) * sample_width
+        return max(0, segments[0][0] - padding_bytes), min(len(frame_data), segments[-1][1] + padding_bytes)
+
+    def trim(self, frame_data, sample_rate, sample_width, padding=0.2):
+        """
+        Returns ``frame_data`` with leading and trailing non-speech removed, keeping ``padding`` seconds of audio around the speech. Returns an empty byte string if there is no speech at all.
+        """
+        kept = self.speech_range(frame_data, sample_rate, sample_width, padding)
+        return frame_data[kept[0]:kept[1]] if kept else b""
+
+
+class EnergyVAD(VoiceActivityDetector):
+    """
+    Classifies audio as speech when its RMS energy is above ``energy_threshold``. This is the behaviour ``Recognizer`` has always used, and the fallback when no better detector is installed.
+    """
+    def __init__(self, energy_threshold=300):
+        self.energy_threshold = energy_threshold
+
+    def is_speech(self, buffer, sample_rate, sample_width, channels=1):
+        return dsp.rms(buffer, sample_width) > self.energy_threshold
+
+
+class WebRTCVAD(VoiceActivityDetector):
+    """
+    Classifies audio with the WebRTC voice activity detector, which is far less sensitive to fans, music and keyboard noise than an energy threshold. Requires the ``webrtcvad`` module.
+
+    ``aggressiveness`` ranges from 0 (least aggressive about filtering out non-speech) to 3 (most aggressive).
+
+    Buffers are split into 30 ms frames; partial frames are carried over to the next call, and a buffer too short to complete a frame gets the previous decision.
+    """
+    supported_rates = (8000, 16000, 32000, 48000)
+
+    def __init__(self, aggressiveness=2):
+        try:
+            import webrtcvad
+        except ImportError:
+            raise SetupError("missing webrtcvad module: ensure that webrtcvad is set up correctly.")
+        self.vad = webrtcvad.Vad(aggressiveness)
+        self.pending = b""
+        self.last_decision = False
+
+    def supports(self, sample_rate):
+        return sample_rate in self.supported_rates
+
+    def is_speech(self, buffer, sample_rate, sample_width, channels=1):
+        assert sample_width == 2, "WebRTC VAD requires 16-bit audio"
+        assert sample_rate in self.supported_rates, "WebRTC VAD requires a sample rate of 8, 16, 32 or 48 kHz"
+        if channels > 1:
+            buffer = dsp.downmix(buffer, sample_width, channels)
+
+        data = self.pending + buffer
+        frame_bytes = int(sample_rate * self.frame_duration) * sample_width
+        frame_count = len(data) // frame_bytes
+        if frame_count:
+            self.last_decision = any(
+                self.vad.is_speech(data[i * frame_bytes:(i + 1) * frame_bytes], sample_rate)
+                for i in range(frame_count)
+            )
+        self.pending = data[frame_count * frame_bytes:]
+        return self.last_decision
+
+    def is_speech_frame(self, frame, sample_rate, sample_width):
+        return self.vad.is_speech(frame, sample_rate)
+
+
+class SileroVAD(VoiceActivityDetector):
+    """
+    Finds speech with the Silero neural VAD model bundled with ``faster_whisper``, running on the CPU through ONNX Runtime. It needs more context than a single buffer, so it only trims whole phrases (``streaming = False``).
+    """
+    streaming = False
+
+    def __init__(self, threshold=0.5, min_silence_duration_ms=500):
+        try:
+            from faster_whisper.vad import VadOptions, get_speech_timestamps
+        except ImportError:
+            raise SetupError("missing faster_whisper module: ensure that faster_whisper is set up correctly.")
+        self.get_speech_timestamps = get_speech_timestamps
+        self.options = VadOptions(threshold=threshold, min_silence_duration_ms=min_silence_duration_ms)
+
+    def is_speech(self, buffer, sample_rate, sample_width, channels=1):
+        return bool(self.speech_segments(buffer, sample_rate, sample_width))
+
+    def speech_segments(self, frame_data, sample_rate, sample_width):
+        assert sample_width == 2 and sample_rate == 16000, "Silero VAD requires 16-bit audio at 16 kHz"
+        audio = dsp.to_float32(frame_data, sample_width)
+        return [
+            (chunk["start"] * sample_width, chunk["end"] * sample_width)
+            for chunk in self.get_speech_timestamps(audio, self.options)
+        ]
+
+
+def get_default_vad(energy_threshold=300):
+    """
+    Returns the best voice activity detector available: WebRTC if ``webrtcvad`` is installed, then Silero through ``faster_whisper``, falling back to an ``EnergyVAD``.
+    """
+    for detector in (WebRTCVAD, SileroVAD):
+        try:
+            return detector()
+        except SetupError:
+            pass
+    return EnergyVAD(energy_threshold)
@@ -18,7 +18,6 @@ a = Analysis(
         'numpy',
         'faster_whisper',
         'ctranslate2',
-        'torch',
         'PIL._tkinter_finder',
     ],
     hookspath=[],
@@ -1,14 +1,18 @@
+import multiprocessing
 import threading
-from AudioTranscriber import AudioTranscriber
+from ImportProfiler import ImportProfiler
+import_profile = ImportProfiler().start()
+from AudioTranscriber import AudioTranscriber, default_decode_workers
+from TranscriptionScheduler import AudioQueue
 from GPTResponder import GPTResponder
 from DeepDive import open_deep_dive
 import customtkinter as ctk
 import AudioRecorder
-import queue
 import time
 import sys
 import TranscriberModels
 import subprocess
+import_profile.stop()
 
 def write_in_textbox(textbox, text):
     textbox.delete("0.0", "end")
@@ -68,10 +72,8 @@ def clear_context(transcriber, responder, speaker_queue, mic_queue):
     if responder:
         responder.clear_context()
 
-    with speaker_queue.mutex:
-        speaker_queue.queue.clear()
-    with mic_queue.mutex:
-        mic_queue.queue.clear()
+    speaker_queue.clear()
+    mic_queue.clear()
 
 def create_ui_components(root, transcriber, responder, speaker_queue, mic_queue):
     ctk.set_appearance_mode("dark")
@@ -232,6 +234,7 @@ def create_ui_components(root, transcriber, responder, speaker_queue, mic_queue)
     return transcript_textbox, response_textbox, research_textbox, sources_textbox, insights_textbox
 
 def main():
+    import_profile.report()
     try:
         subprocess.run(["ffmpeg", "-version"], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
     except FileNotFoundError:
@@ -239,20 +242,24 @@ def main():
         return
 
     root = ctk.CTk()
-    speaker_queue = queue.Queue()
-    mic_queue = queue.Queue()
+    speaker_queue = AudioQueue()
+    mic_queue = AudioQueue()
 
     user_audio_recorder = AudioRecorder.DefaultMicRecorder()
     user_audio_recorder.record_into_queue(mic_queue)
 
-    time.sleep(2)
+    if user_audio_recorder.calibrated_live:
+        time.sleep(2)  # give the user a moment between the two calibration prompts
 
     speaker_audio_recorder = AudioRecorder.DefaultSpeakerRecorder()
     speaker_audio_recorder.record_into_queue(speaker_queue)
 
-    model = TranscriberModels.get_model('--api' in sys.argv)
+    decode_workers = default_decode_workers()
+    worker_processes = 0 if '--worker-processes' in sys.argv else None  # decode in separate processes, one per 4 cores
+    model = TranscriberModels.get_model('--api' in sys.argv, num_workers=decode_workers, hybrid='--hybrid' in sys.argv,
+                                        worker_processes=worker_processes)
 
-    transcriber = AudioTranscriber(user_audio_recorder.source, speaker_audio_recorder.source, model)
+    transcriber = AudioTranscriber(user_audio_recorder, speaker_audio_recorder, model, decode_workers=decode_workers)
     transcribe = threading.Thread(target=transcriber.transcribe_audio_queue, args=(speaker_queue, mic_queue))
     transcribe.daemon = True
     transcribe.start()
@@ -277,4 +284,5 @@ def main():
     root.mainloop()
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()  # lets --worker-processes spawn workers from the frozen executable
     main()
\ No newline at end of file